@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # docs
     "drf_yasg",
     # libraries
@@ -153,7 +154,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -198,6 +199,9 @@ CELERY_RESULT_BACKEND = 'redis://localhost:6379'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+# Users without login for this count of days are banned, ban is updated by ranges of ids of this size
+INACTIVE_USER_DAYS = 31
+BAN_CHUNK_SIZE = 10000
 
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_BEAT_SCHEDULE = {
@@ -205,8 +209,46 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'users.tasks.ban_inactive_users',
         'schedule': crontab(hour=3, minute=0),
     },
+    "send_daily_digest": {
+        'task': 'courses.tasks.send_daily_digest',
+        'schedule': crontab(hour=8, minute=0),
+    },
+    "send_outbox_emails": {
+        'task': 'users.tasks.send_outbox_emails',
+        'schedule': crontab(minute="*"),
+    },
+    "flush_last_logins": {
+        'task': 'users.tasks.flush_last_logins',
+        'schedule': crontab(minute="*"),
+    },
+    "reconcile_payments": {
+        'task': 'users.tasks.reconcile_payments',
+        'schedule': crontab(minute="*/15"),
+    },
+    "delete_expired_idempotency_keys": {
+        'task': 'users.tasks.delete_expired_idempotency_keys',
+        'schedule': crontab(hour=4, minute=0),
+    },
 }
 
+# Cache settings
+CACHE_ENABLED = os.getenv("CACHE_ENABLED") == "True"
+CACHE_TIMEOUT = 60 * 15
+# Cache of moderator role of user
+ROLE_CACHE_TIMEOUT = 60
+# Seconds of saving of responses of requests with idempotency key and of lock of request in progress
+IDEMPOTENCY_KEY_TIMEOUT = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "redis://localhost:6379/1")
+
+if CACHE_ENABLED:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_LOCATION,
+        }
+    }
+
 # Email message sanding
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -215,6 +257,39 @@ EMAIL_HOST_USER = os.getenv("EMAIL_ADDRESS")
 EMAIL_HOST_PASSWORD = os.getenv("APP_EMAIL_PASSWORD")
 EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
+# Count of messages sent with one SMTP connection
+MAILING_CHUNK_SIZE = 500
+# Outbox of emails: sending rate (messages per second and burst), batch size and retries with backoff (seconds)
+EMAIL_RATE_LIMIT = 1
+EMAIL_RATE_BURST = 10
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_DRAIN_TIME = 50
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_DELAY = 60
+EMAIL_MAX_RETRY_DELAY = 60 * 60
+# Seconds of claim of emails by worker, emails of crashed worker are sent again after it
+EMAIL_SENDING_TIMEOUT = 10 * 60
+# Seconds from course update to mailing, updates during this time are sent with one mailing
+MAILING_DEBOUNCE_TIME = 5 * 60
 
 # Secret data
 STRIPE_API_KEY = os.getenv("STRIPE_API_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# Stripe client: base url of API (for local fake server), timeouts of connection and response (seconds),
+# count of retries of failed requests
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+STRIPE_CONNECT_TIMEOUT = 3
+STRIPE_READ_TIMEOUT = 10
+STRIPE_MAX_RETRIES = 2
+# Cache of price_id of Stripe prices by product, currency and amount
+STRIPE_PRICE_CACHE_TIMEOUT = 60 * 60 * 24
+# API service of transfers. Local stand-in of Stripe for load testing is
+# "users.src.fake_stripe.FakeStripeAPIService" with latency (seconds) and rate of failures of calls
+TRANSFER_API_SERVICE = os.getenv("TRANSFER_API_SERVICE", "users.src.transfer_api_service.StripeAPIService")
+FAKE_STRIPE_LATENCY = float(os.getenv("FAKE_STRIPE_LATENCY", 0))
+FAKE_STRIPE_FAILURE_RATE = float(os.getenv("FAKE_STRIPE_FAILURE_RATE", 0))
+# Reconciliation of pending transfers with Stripe: period of checkout sessions (24 hours in Stripe),
+# payments in batch and concurrent requests to Stripe
+PAYMENT_RECONCILE_PERIOD = timedelta(days=1)
+PAYMENT_RECONCILE_BATCH_SIZE = 100
+PAYMENT_RECONCILE_CONCURRENCY = 8
@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import Mailing
+
+
+@admin.register(Mailing)
+class MailingAdmin(admin.ModelAdmin):
+    list_display = ("id", "course", "created_at", "status", "total")
+    list_filter = ("status",)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0006_course_updated_at_lesson_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(fields=["name", "id"], name="lesson_name_id_idx"),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0008_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="course",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="course_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lesson",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="lesson_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
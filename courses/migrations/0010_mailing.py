@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_name_trigram_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Mailing",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("IN_PROGRESS", "в процессе"), ("DONE", "завершена")],
+                        default="IN_PROGRESS",
+                        max_length=11,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="courses.course", verbose_name="Курс"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "рассылка",
+                "verbose_name_plural": "рассылки",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="MailingChunk",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("first_id", models.BigIntegerField(verbose_name="Первый id подписки")),
+                ("last_id", models.BigIntegerField(verbose_name="Последний id подписки")),
+                (
+                    "last_sent_id",
+                    models.BigIntegerField(blank=True, null=True, verbose_name="Id последней обработанной подписки"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "ожидает"), ("DONE", "отправлен")],
+                        default="PENDING",
+                        max_length=7,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")),
+                ("sent", models.PositiveIntegerField(default=0, verbose_name="Отправлено")),
+                ("failed", models.PositiveIntegerField(default=0, verbose_name="Ошибки отправки")),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="courses.mailing", verbose_name="Рассылка"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "часть рассылки",
+                "verbose_name_plural": "части рассылки",
+                "ordering": ["first_id"],
+            },
+        ),
+    ]
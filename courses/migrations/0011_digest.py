@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_mailing"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Digest",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                ("period_start", models.DateTimeField(verbose_name="Начало периода")),
+                ("period_end", models.DateTimeField(verbose_name="Конец периода")),
+                ("sent", models.PositiveIntegerField(default=0, verbose_name="Отправлено")),
+            ],
+            options={
+                "verbose_name": "сводка",
+                "verbose_name_plural": "сводки",
+                "ordering": ["-period_end"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["updated_at"], name="course_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="stripe_prices",
+            field=models.JSONField(blank=True, default=dict, verbose_name="Значения price_id в Stripe по ценам"),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="stripe_prices",
+            field=models.JSONField(blank=True, default=dict, verbose_name="Значения price_id в Stripe по ценам"),
+        ),
+    ]
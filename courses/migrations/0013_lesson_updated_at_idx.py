@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_stripe_prices"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(fields=["updated_at"], name="lesson_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_lesson_updated_at_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mailing",
+            name="status",
+            field=models.CharField(
+                choices=[("SCHEDULED", "запланирована"), ("IN_PROGRESS", "в процессе"), ("DONE", "завершена")],
+                default="IN_PROGRESS",
+                max_length=11,
+                verbose_name="Статус",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="mailing",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "SCHEDULED")), fields=("course",), name="mailing_scheduled_course_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_mailing_scheduled"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="mailingchunk",
+            name="failed",
+        ),
+        migrations.RemoveField(
+            model_name="mailingchunk",
+            name="sent",
+        ),
+    ]
@@ -1,5 +1,18 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
+# Text search configuration of search vectors and queries
+SEARCH_CONFIG = "russian"
+
+
+def get_search_vector() -> SearchVector:
+    """Weighted search vector of "name" and "description" fields"""
+
+    return SearchVector("name", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "description", weight="B", config=SEARCH_CONFIG
+    )
+
 
 class Course(models.Model):
     name = models.CharField(max_length=150, verbose_name="Название курса", unique=True)
@@ -11,7 +24,11 @@ class Course(models.Model):
     stripe_product_id = models.CharField(
         max_length=50, verbose_name="Значение product_id в Stripe", null=True, blank=True
     )
+    stripe_prices = models.JSONField(default=dict, blank=True, verbose_name="Значения price_id в Stripe по ценам")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления", null=True, blank=True)
+    search_vector = models.GeneratedField(
+        expression=get_search_vector(), output_field=SearchVectorField(), db_persist=True
+    )
 
     def __str__(self) -> str:
         return f"{self.name}"
@@ -20,6 +37,12 @@ class Course(models.Model):
         verbose_name = "пользователь"
         verbose_name_plural = "пользователи"
         ordering = ["name"]
+        indexes = [
+            # Index for digest of updated courses and ETag of course list by last update
+            models.Index(fields=["updated_at"], name="course_updated_at_idx"),
+            GinIndex(fields=["search_vector"], name="course_search_vector_idx"),
+            GinIndex(fields=["name"], name="course_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
 
 
 class Lesson(models.Model):
@@ -33,7 +56,11 @@ class Lesson(models.Model):
     stripe_product_id = models.CharField(
         max_length=50, verbose_name="Значение product_id в Stripe", null=True, blank=True
     )
+    stripe_prices = models.JSONField(default=dict, blank=True, verbose_name="Значения price_id в Stripe по ценам")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления", null=True, blank=True)
+    search_vector = models.GeneratedField(
+        expression=get_search_vector(), output_field=SearchVectorField(), db_persist=True
+    )
 
     def __str__(self) -> str:
         return f"{self.name}"
@@ -42,3 +69,95 @@ class Lesson(models.Model):
         verbose_name = "урок"
         verbose_name_plural = "уроки"
         ordering = ["name"]
+        indexes = [
+            # Index for keyset pagination by ("name", "id")
+            models.Index(fields=["name", "id"], name="lesson_name_id_idx"),
+            GinIndex(fields=["search_vector"], name="lesson_search_vector_idx"),
+            GinIndex(fields=["name"], name="lesson_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            # Index for ETag of lesson list by last update
+            models.Index(fields=["updated_at"], name="lesson_updated_at_idx"),
+        ]
+
+
+class Mailing(models.Model):
+    """
+    Model of mailing of course update to subscribers. Subscribers are split to chunks sent by celery subtasks.
+    Course has only one scheduled mailing, so updates of course in debounce time are coalesced to it
+    """
+
+    STATUS_CHOICES = (("SCHEDULED", "запланирована"), ("IN_PROGRESS", "в процессе"), ("DONE", "завершена"))
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name="Курс")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    status = models.CharField(max_length=11, choices=STATUS_CHOICES, default="IN_PROGRESS", verbose_name="Статус")
+    total = models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")
+
+    def __str__(self) -> str:
+        return f"{self.course} - {self.created_at}"
+
+    def get_progress(self) -> dict:
+        """
+        Count of sent, failed and pending messages of mailing by status of emails of chunks in outbox.
+        Messages of pending chunks and emails waiting in outbox are pending
+        """
+
+        progress = self.mailingchunk_set.aggregate(
+            sent_count=models.Count("outboxemail", filter=models.Q(outboxemail__status="SENT")),
+            failed_count=models.Count("outboxemail", filter=models.Q(outboxemail__status="FAILED")),
+        )
+        return {
+            "sent": progress["sent_count"],
+            "failed": progress["failed_count"],
+            "pending": self.total - progress["sent_count"] - progress["failed_count"],
+        }
+
+    class Meta:
+        verbose_name = "рассылка"
+        verbose_name_plural = "рассылки"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course"], condition=models.Q(status="SCHEDULED"), name="mailing_scheduled_course_unique"
+            ),
+        ]
+
+
+class MailingChunk(models.Model):
+    """
+    Model of chunk of mailing with range of subscription ids. Emails of chunk are saved to outbox with link to chunk,
+    field "last_sent_id" is updated with them, so resumed chunk doesn't send messages again
+    """
+
+    STATUS_CHOICES = (("PENDING", "ожидает"), ("DONE", "отправлен"))
+
+    mailing = models.ForeignKey(Mailing, on_delete=models.CASCADE, verbose_name="Рассылка")
+    first_id = models.BigIntegerField(verbose_name="Первый id подписки")
+    last_id = models.BigIntegerField(verbose_name="Последний id подписки")
+    last_sent_id = models.BigIntegerField(null=True, blank=True, verbose_name="Id последней обработанной подписки")
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="PENDING", verbose_name="Статус")
+    total = models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")
+
+    def __str__(self) -> str:
+        return f"{self.mailing} - {self.first_id}-{self.last_id}"
+
+    class Meta:
+        verbose_name = "часть рассылки"
+        verbose_name_plural = "части рассылки"
+        ordering = ["first_id"]
+
+
+class Digest(models.Model):
+    """Model of daily digest of course updates for subscribers with digest notification mode"""
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    period_start = models.DateTimeField(verbose_name="Начало периода")
+    period_end = models.DateTimeField(verbose_name="Конец периода")
+    sent = models.PositiveIntegerField(default=0, verbose_name="Отправлено")
+
+    def __str__(self) -> str:
+        return f"{self.period_start} - {self.period_end}"
+
+    class Meta:
+        verbose_name = "сводка"
+        verbose_name_plural = "сводки"
+        ordering = ["-period_end"]
@@ -1,7 +1,179 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPaginator(BasePagination):
+    """
+    Keyset (cursor) paginator. Page is selected with condition on values of "ordering" fields of last object
+    of previous page, so request of any page doesn't use COUNT and OFFSET.
+    Last field of "ordering" must be unique ("id") to make order stable. Fields with prefix "-" are descending
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering: tuple = ("name", "id")
+    invalid_cursor_message = "Неверный курсор"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.has_next = False
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            position = self.coerce_position(queryset, position)
+
+        results = self.get_results(queryset, position, self.page_size + 1)
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_results(self, queryset: QuerySet, position: list | None, limit: int) -> list:
+        """Objects of page after position in order of "ordering" fields"""
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+        return list(queryset[:limit])
+
+    def get_position_filter(self, position: list) -> Q:
+        """
+        Condition "(f1, f2, ...) > (v1, v2, ...)" with direction of each field.
+        Condition is started with redundant bound "f1 >= v1", so index scan is started at position
+        instead of filtering of all rows with OR conditions
+        """
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        if len(self.ordering) > 1:
+            field = self.ordering[0]
+            lookup = "lte" if field.startswith("-") else "gte"
+            condition = Q(**{f"{field.lstrip('-')}__{lookup}": position[0]}) & condition
+        return condition
+
+    def get_field(self, queryset: QuerySet, name: str) -> Field:
+        """Field of model or annotation of queryset"""
+
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def coerce_position(self, queryset: QuerySet, position: list) -> list:
+        """
+        Convert values of cursor to python types of "ordering" fields
+
+        :raise NotFound: if value of cursor is not valid for field
+        """
+
+        values = []
+        for field_name, value in zip(self.ordering, position):
+            field = self.get_field(queryset, field_name.lstrip("-"))
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None and not field.null:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def get_position(self, obj: Model) -> list:
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, position: list) -> str:
+        data = json.dumps(position, cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, request: Request) -> list | None:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.get_position(self.page[-1])))
+
+    def get_paginated_response(self, data: list) -> Response:
+        return Response(OrderedDict([("next", self.get_next_link()), ("results", data)]))
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class SearchKeysetPaginator(KeysetPaginator):
+    """Keyset paginator of search results ordered by rank"""
+
+    ordering = ("-rank", "id")
 
 
 class CustomCoursesPaginator(PageNumberPagination):
+    """
+    Page number paginator of courses and lessons.
+    With query param "pagination=cursor" (or "cursor") pages are selected with KeysetPaginator
+    """
+
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    mode_query_param = "pagination"
+    keyset_paginator_class = KeysetPaginator
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list | None:
+        self.keyset_paginator = None
+        if self.is_keyset_mode(request):
+            self.keyset_paginator = self.keyset_paginator_class()
+            return self.keyset_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_keyset_mode(self, request: Request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_paginator_class.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data: list) -> Response:
+        if self.keyset_paginator:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,7 +1,5 @@
 from rest_framework import serializers
 
-from users.models import Subscription
-
 from .models import Course, Lesson
 from .validators import VideoUrlValidator
 
@@ -23,20 +21,14 @@ class CourseSerializer(serializers.ModelSerializer):
 
 
 class CourseRetrieveSerializer(serializers.ModelSerializer):
-    lessons_count = serializers.SerializerMethodField()
-    lessons = LessonSerializer(source="lesson_set.all", many=True)
-    subscription = serializers.SerializerMethodField()
-
-    def get_subscription(self, obj: Course) -> bool:
-        user = self.context["request"].user
-        try:
-            subscription = obj.subscription_set.get(user=user).subscription
-        except Subscription.DoesNotExist:
-            subscription = False
-        return subscription
-
-    def get_lessons_count(self, obj: Course) -> int:
-        return obj.lesson_set.all().count()
+    """
+    Serializer of course page. Fields "lessons_count" and "is_subscribed" are annotated
+    in CourseViewSet.get_queryset, lessons are prefetched
+    """
+
+    lessons_count = serializers.IntegerField(read_only=True)
+    lessons = LessonSerializer(source="lesson_set.all", many=True, read_only=True)
+    subscription = serializers.BooleanField(source="is_subscribed", read_only=True)
 
     class Meta:
         model = Course
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Subscription
+
+from .models import Course, Lesson
+from .src import cache
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_cache(sender: type, instance: Course, **kwargs: dict) -> None:
+    cache.invalidate_course(instance.pk)
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_course(sender: type, instance: Lesson, **kwargs: dict) -> None:
+    """Remember previous course of lesson, page of this course is invalidated if lesson is moved"""
+
+    instance.previous_course_id = None
+    if instance.pk and not kwargs.get("raw"):
+        instance.previous_course_id = Lesson.objects.filter(pk=instance.pk).values_list("course_id", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_lesson_cache(sender: type, instance: Lesson, **kwargs: dict) -> None:
+    course_pks = [instance.course_id]
+    if getattr(instance, "previous_course_id", None):
+        course_pks.append(instance.previous_course_id)
+    cache.invalidate_lesson(*course_pks)
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidate_subscription_cache(sender: type, instance: Subscription, **kwargs: dict) -> None:
+    cache.invalidate_subscription(instance.course_id, instance.user_id)
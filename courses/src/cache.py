@@ -0,0 +1,103 @@
+import time
+from typing import Callable
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+COURSES_VERSION_KEY = "catalog:courses:version"
+LESSONS_VERSION_KEY = "catalog:lessons:version"
+COURSE_VERSION_KEY = "catalog:course:{pk}:version"
+
+
+def get_version(key: str) -> int:
+    """
+    Get version of cached group of responses. New version starts from current time,
+    so after eviction of version key old responses are not used
+    """
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key: str) -> None:
+    """Change version of group of responses, all cached responses of previous version are not used"""
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_query_key(request: Request) -> str:
+    """Host and sorted query params of request, pagination links of response depend on them"""
+
+    return f"{request.get_host()}?{urlencode(sorted(request.query_params.lists()), doseq=True)}"
+
+
+def course_list_key(request: Request) -> str:
+    return f"catalog:courses:v{get_version(COURSES_VERSION_KEY)}:list:{get_query_key(request)}"
+
+
+def course_detail_key(course_pk: int | str, user_pk: int) -> str | None:
+    """Key of course page for user, None for invalid pk from url"""
+
+    if not str(course_pk).isdigit():
+        return None
+    course_pk = int(course_pk)
+    version = get_version(COURSE_VERSION_KEY.format(pk=course_pk))
+    return f"catalog:course:{course_pk}:v{version}:user:{user_pk}"
+
+
+def lesson_list_key(request: Request) -> str:
+    return f"catalog:lessons:v{get_version(LESSONS_VERSION_KEY)}:list:{get_query_key(request)}"
+
+
+def invalidate_course(course_pk: int) -> None:
+    """Invalidate course lists and pages of course for all users"""
+
+    bump_version(COURSES_VERSION_KEY)
+    bump_version(COURSE_VERSION_KEY.format(pk=course_pk))
+
+
+def invalidate_lesson(*course_pks: int) -> None:
+    """Invalidate lesson lists and pages of courses with lesson"""
+
+    bump_version(LESSONS_VERSION_KEY)
+    for course_pk in set(course_pks):
+        bump_version(COURSE_VERSION_KEY.format(pk=course_pk))
+
+
+def invalidate_subscription(course_pk: int, user_pk: int) -> None:
+    """Invalidate page of course for subscribed user only"""
+
+    cache.delete(course_detail_key(course_pk, user_pk))
+
+
+def get_cached_response(key: str | None, get_response: Callable[[], Response]) -> Response:
+    """
+    Return response with data from cache by key. If data is not cached get response and cache its data.
+    Works if settings.CACHE_ENABLED
+
+    :param key: key of cached data, response is not cached if key is None
+    :param get_response: function for building of response
+    :return: response
+    """
+
+    if not settings.CACHE_ENABLED or key is None:
+        return get_response()
+
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = get_response()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, settings.CACHE_TIMEOUT)
+    return response
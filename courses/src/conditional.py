@@ -0,0 +1,90 @@
+"""
+Functions of validators for django.views.decorators.http.condition.
+Validators are got with one indexed query, so 304 response is returned without serialization of objects
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Count, Exists, Max, Model, OuterRef
+from rest_framework.request import Request
+
+from courses.models import Course, Lesson
+from courses.src.cache import COURSES_VERSION_KEY, LESSONS_VERSION_KEY, get_query_key, get_version
+from users.models import Subscription
+
+
+def make_etag(*values: object) -> str:
+    return hashlib.md5("|".join(str(value) for value in values).encode()).hexdigest()
+
+
+def get_last_update(model: type[Model]) -> datetime | None:
+    """Date of last update of course or lesson with index of "updated_at" instead of aggregate of all table"""
+
+    return (
+        model.objects.filter(updated_at__isnull=False)
+        .order_by("-updated_at")
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+
+
+def course_list_etag(request: Request, *args: tuple, **kwargs: dict) -> str | None:
+    """
+    ETag of course list by version of course lists (changed after delete), last update and query params.
+    Local memory cache doesn't share versions between processes, so without Redis list has no ETag
+    """
+
+    if not settings.CACHE_ENABLED:
+        return None
+    return make_etag("courses", get_version(COURSES_VERSION_KEY), get_last_update(Course), get_query_key(request))
+
+
+def course_detail_etag(request: Request, pk: int | str, *args: tuple, **kwargs: dict) -> str | None:
+    """ETag of course page by updates of course and its lessons, count of lessons and subscription of user"""
+
+    if not str(pk).isdigit():
+        return None
+    user_subscription = Subscription.objects.filter(course=OuterRef("pk"), user_id=request.user.pk, subscription=True)
+    data = (
+        Course.objects.filter(pk=pk)
+        .annotate(
+            lessons_update=Max("lesson__updated_at"),
+            lessons_count=Count("lesson"),
+            is_subscribed=Exists(user_subscription),
+        )
+        .values_list("updated_at", "lessons_update", "lessons_count", "is_subscribed")
+        .first()
+    )
+    if data is None:
+        return None
+    return make_etag("course", pk, *data)
+
+
+def lesson_list_etag(request: Request, *args: tuple, **kwargs: dict) -> str | None:
+    """
+    ETag of lesson list by version of lesson lists (changed after delete), last update and query params.
+    Local memory cache doesn't share versions between processes, so without Redis list has no ETag
+    """
+
+    if not settings.CACHE_ENABLED:
+        return None
+    return make_etag("lessons", get_version(LESSONS_VERSION_KEY), get_last_update(Lesson), get_query_key(request))
+
+
+def lesson_last_modified(request: Request, pk: int | str, *args: tuple, **kwargs: dict) -> datetime | None:
+    """Date of lesson update, saved in request for ETag of lesson"""
+
+    if not str(pk).isdigit():
+        return None
+    if not hasattr(request, "lesson_updated_at"):
+        request.lesson_updated_at = Lesson.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    return request.lesson_updated_at
+
+
+def lesson_detail_etag(request: Request, pk: int | str, *args: tuple, **kwargs: dict) -> str | None:
+    last_modified = lesson_last_modified(request, pk)
+    if last_modified is None:
+        return None
+    return make_etag("lesson", pk, last_modified)
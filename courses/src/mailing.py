@@ -0,0 +1,142 @@
+import logging
+import time
+from datetime import datetime
+from itertools import groupby, islice
+from typing import Iterable, Iterator
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from config.settings import BASE_URL
+from courses.models import Course, Mailing, MailingChunk
+from users.models import Subscription
+from users.src.outbox import enqueue_emails
+
+logger = logging.getLogger("celery_tasks")
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split iterable to lists with length of size"""
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def get_course_update_email(course: Course, email: str) -> tuple[str, str, str]:
+    """Subject, body and recipient of email of course update"""
+
+    return (
+        f"Обновление курса {course.name}",
+        f"""
+            Курс {course.name} на который вы подписаны обновлен.
+            Для просмотра изменений зайдите на страницу курса '{BASE_URL}course/{course.id}/'
+        """,
+        email,
+    )
+
+
+def get_mailing_subscriptions(course: Course) -> QuerySet:
+    """Subscriptions of course which get mailing of course update"""
+
+    return Subscription.objects.filter(
+        course=course, subscription=True, user__is_active=True, user__notification_mode="IMMEDIATE"
+    )
+
+
+def create_mailing(course: Course, chunk_size: int, mailing: Mailing | None = None) -> Mailing:
+    """
+    Create mailing of course update with chunks by ranges of subscription ids
+
+    :param course: updated course
+    :param chunk_size: count of subscribers in chunk
+    :param mailing: scheduled mailing, new mailing is created if it is None
+    :return: mailing
+    """
+
+    if mailing is None:
+        mailing = Mailing.objects.create(course=course)
+    subscription_ids = get_mailing_subscriptions(course).order_by("id").values_list("id", flat=True)
+    chunks = [
+        MailingChunk(mailing=mailing, first_id=ids[0], last_id=ids[-1], total=len(ids))
+        for ids in chunked(subscription_ids.iterator(chunk_size=chunk_size), chunk_size)
+    ]
+    MailingChunk.objects.bulk_create(chunks, batch_size=chunk_size)
+    mailing.status = "IN_PROGRESS"
+    mailing.total = sum(chunk.total for chunk in chunks)
+    mailing.save(update_fields=["status", "total"])
+    return mailing
+
+
+def send_mailing_chunk(chunk: MailingChunk) -> None:
+    """
+    Save emails of chunk to outbox. Emails and progress of chunk are saved in one transaction,
+    so emails of chunk are not saved twice
+
+    :param chunk: chunk of mailing
+    """
+
+    course = chunk.mailing.course
+    start_id = chunk.first_id if chunk.last_sent_id is None else chunk.last_sent_id + 1
+    subscriptions = list(
+        get_mailing_subscriptions(course)
+        .filter(id__range=(start_id, chunk.last_id))
+        .order_by("id")
+        .values_list("id", "user__email")
+    )
+
+    start = time.monotonic()
+    with transaction.atomic():
+        count = enqueue_emails(
+            (get_course_update_email(course, email) for _, email in subscriptions), mailing_chunk=chunk
+        )
+        MailingChunk.objects.filter(pk=chunk.pk).update(last_sent_id=chunk.last_id, status="DONE")
+    duration = time.monotonic() - start
+    logger.info(
+        f"Update course: {course.name} - chunk {chunk.first_id}-{chunk.last_id}: {count} emails to outbox, "
+        f"{count / duration if duration else 0:.1f} emails/s"
+    )
+
+
+def get_digest_email(email: str, courses: list[tuple[int, str]]) -> tuple[str, str, str]:
+    """Subject, body and recipient of digest email"""
+
+    courses_text = "\n".join(f"{name} - '{BASE_URL}course/{course_id}/'" for course_id, name in courses)
+    return (
+        "Обновления курсов, на которые вы подписаны",
+        f"""
+            За последние сутки обновлены курсы, на которые вы подписаны:
+            {courses_text}
+        """,
+        email,
+    )
+
+
+def send_subscription_digest(period_start: datetime, period_end: datetime, chunk_size: int) -> int:
+    """
+    Save one email with all courses updated in period to outbox for each subscriber with notification mode "DIGEST".
+    Subscriptions of updated courses are got with one query ordered by user and grouped to emails
+
+    :param period_start: start of period of course updates
+    :param period_end: end of period of course updates
+    :param chunk_size: count of emails in one insert
+    :return: count of saved emails
+    """
+
+    rows = (
+        Subscription.objects.filter(
+            subscription=True,
+            user__is_active=True,
+            user__notification_mode="DIGEST",
+            course__updated_at__gte=period_start,
+            course__updated_at__lt=period_end,
+        )
+        .order_by("user_id", "course__name")
+        .values_list("user_id", "user__email", "course_id", "course__name")
+        .iterator(chunk_size=chunk_size)
+    )
+    emails = (
+        get_digest_email(email, [(course_id, name) for _, _, course_id, name in user_rows])
+        for (_, email), user_rows in groupby(rows, key=lambda row: (row[0], row[1]))
+    )
+    return sum(enqueue_emails(chunk, batch_size=chunk_size) for chunk in chunked(emails, chunk_size))
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Model, QuerySet, Value
+from django.db.models.functions import Cast
+
+from courses.models import SEARCH_CONFIG, Course
+from courses.src import cache
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+def search_queryset(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filter queryset of Course or Lesson by text query with GIN index of "search_vector" and annotate rank.
+    Rank is cast to double precision, so value in cursor of KeysetPaginator is compared exactly
+
+    :param queryset: queryset of Course or Lesson
+    :param query: text of query in web search syntax
+    :return: filtered queryset with field "rank", empty queryset for empty query
+    """
+
+    if not query.strip():
+        # Empty result has field "rank" for ordering and cursor of KeysetPaginator
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=Cast(SearchRank(F("search_vector"), search_query), output_field=FloatField())
+    )
+
+
+def autocomplete_names(model: type[Model], query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict]:
+    """
+    Names of courses or lessons most similar to query for typeahead.
+    With shared Redis cache (settings.CACHE_ENABLED) results of hot queries are saved in process LRU cache,
+    key of it has version of course or lesson lists, so saved results are not used after change of names.
+    Local memory cache doesn't share versions between processes, so without Redis names are always queried
+
+    :param model: Course or Lesson
+    :param query: beginning or part of name
+    :param limit: count of names
+    :return: list of dicts with "id" and "name"
+    """
+
+    query = " ".join(query.lower().split())
+    if not query:
+        return []
+
+    limit = min(limit, AUTOCOMPLETE_MAX_LIMIT)
+    if settings.CACHE_ENABLED:
+        version_key = cache.COURSES_VERSION_KEY if model is Course else cache.LESSONS_VERSION_KEY
+        names = find_similar_names(model, cache.get_version(version_key), query, limit)
+    else:
+        names = find_similar_names.__wrapped__(model, None, query, limit)
+    return [{"id": pk, "name": name} for pk, name in names]
+
+
+@lru_cache(maxsize=1024)
+def find_similar_names(model: type[Model], version: int | None, query: str, limit: int) -> tuple:
+    """Query of names with trigram GIN index of "name" field. Argument "version" is a part of LRU cache key"""
+
+    queryset = (
+        model.objects.filter(name__trigram_word_similar=query)
+        .annotate(similarity=TrigramWordSimilarity(query, "name"))
+        .order_by("-similarity", "name", "id")
+        .values_list("id", "name")
+    )
+    return tuple(queryset[:limit])
@@ -1,37 +1,139 @@
 import logging
 
-from celery import shared_task
-from django.core.mail import send_mail
+from celery import chord, shared_task
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from config.settings import BASE_URL, EMAIL_HOST_USER
-from courses.models import Course
+from config.settings import MAILING_CHUNK_SIZE, MAILING_DEBOUNCE_TIME
+from courses.models import Course, Digest, Mailing, MailingChunk
+from courses.src.mailing import create_mailing, send_mailing_chunk, send_subscription_digest
 
 
 logger = logging.getLogger("celery_tasks")
 
 
-@shared_task
-def mailing_to_course_subscribers(course_pk: int) -> None:
+def dispatch_mailing(mailing: Mailing) -> None:
+    """Start subtasks for pending chunks of mailing and task of finish after them"""
+
+    chunk_pks = list(mailing.mailingchunk_set.filter(status="PENDING").values_list("pk", flat=True))
+    if chunk_pks:
+        chord(send_mailing_chunk_task.si(chunk_pk) for chunk_pk in chunk_pks)(finish_mailing.si(mailing.pk))
+    else:
+        finish_mailing.delay(mailing.pk)
+
+
+@shared_task(acks_late=True)
+def mailing_to_course_subscribers(course_pk: int, mailing_pk: int | None = None) -> None:
     """
-    Task for sending email to subscribers of course
+    Task for sending email to subscribers of course.
+    Create mailing with chunks of subscribers and send chunks with parallel subtasks.
+    Start of mailing and its chunks are saved in one transaction and task is acknowledged after finish,
+    so after crash of worker scheduled mailing is started again and pending chunks of started mailing are sent
 
     :param course_pk: pk of Course model
+    :param mailing_pk: pk of scheduled Mailing model, new mailing is created if it is None
     """
 
     course = Course.objects.get(id=course_pk)
-    subscribers_queryset = course.subscription_set.filter(subscription=True)
-    logger.info(f"Update course: {course.name} - mailing for subscribers count: {subscribers_queryset.count()}")
-    for subscription in subscribers_queryset:
-        try:
-            send_mail(
-                subject=f"Обновление курса {course.name}",
-                message=f"""
-                    Курс {course.name} на который вы подписаны обновлен.
-                    Для просмотра изменений зайдите на страницу курса '{BASE_URL}course/{course.id}/'
-                """,
-                from_email=EMAIL_HOST_USER,
-                recipient_list=[subscription.user.email],
-            )
-        except Exception as e:
-            print(f"User: {subscription.user.email} - {e}")
-            logger.error(f"User: {subscription.user.email} - {e}")
+    with transaction.atomic():
+        mailing = None
+        if mailing_pk is not None:
+            mailing = Mailing.objects.select_for_update().get(pk=mailing_pk)
+            # Scheduled mailing is started once, new updates of course schedule new mailing after this
+            if mailing.status != "SCHEDULED":
+                logger.warning(f"Update course: {course.name} - mailing {mailing_pk} is already started")
+                if mailing.status == "IN_PROGRESS":
+                    transaction.on_commit(lambda: dispatch_mailing(mailing))
+                return
+        mailing = create_mailing(course, MAILING_CHUNK_SIZE, mailing)
+    logger.info(f"Update course: {course.name} - mailing {mailing.pk} for subscribers count: {mailing.total}")
+    dispatch_mailing(mailing)
+
+
+@shared_task(acks_late=True)
+def send_mailing_chunk_task(chunk_pk: int) -> None:
+    """
+    Task for sending of chunk of mailing. Task is acknowledged after finish, so it is delivered again after crash
+    of worker, row lock of chunk doesn't allow to send one chunk by two workers
+
+    :param chunk_pk: pk of MailingChunk model
+    """
+
+    with transaction.atomic():
+        chunk = (
+            MailingChunk.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("mailing__course")
+            .filter(pk=chunk_pk)
+            .first()
+        )
+        if chunk is None:
+            logger.warning(f"Mailing chunk {chunk_pk} is sending by other worker")
+            return
+        if chunk.status == "PENDING":
+            send_mailing_chunk(chunk)
+
+
+@shared_task
+def finish_mailing(mailing_pk: int) -> None:
+    """
+    Task for finish of mailing after all chunks. Mailing is done when emails of all chunks are saved to outbox,
+    progress of delivery is counted by status of emails in outbox
+
+    :param mailing_pk: pk of Mailing model
+    """
+
+    mailing = Mailing.objects.get(pk=mailing_pk)
+    if not mailing.mailingchunk_set.filter(status="PENDING").exists():
+        mailing.status = "DONE"
+        mailing.save(update_fields=["status"])
+    logger.info(f"Mailing {mailing.pk} of course {mailing.course_id} - {mailing.get_progress()}")
+
+
+@shared_task
+def resume_mailing(mailing_pk: int) -> None:
+    """
+    Task for sending of pending chunks of mailing, for example after crash of worker.
+    Messages sent before are not sent again
+
+    :param mailing_pk: pk of Mailing model
+    """
+
+    dispatch_mailing(Mailing.objects.get(pk=mailing_pk))
+
+
+def schedule_course_mailing(course_pk: int) -> bool:
+    """
+    Schedule mailing of course update after MAILING_DEBOUNCE_TIME seconds.
+    Updates of course until start of mailing are coalesced to one scheduled mailing by unique constraint
+    of scheduled mailing of course in database, so it works for all web processes
+
+    :param course_pk: pk of Course model
+    :return: True if new mailing is scheduled
+    """
+
+    try:
+        with transaction.atomic():
+            mailing = Mailing.objects.create(course_id=course_pk, status="SCHEDULED")
+    except IntegrityError:
+        return False
+    transaction.on_commit(
+        lambda: mailing_to_course_subscribers.apply_async((course_pk, mailing.pk), countdown=MAILING_DEBOUNCE_TIME)
+    )
+    return True
+
+
+@shared_task
+def send_daily_digest() -> None:
+    """
+    Task for sending digest of courses updated since previous digest to subscribers with notification mode "DIGEST"
+    """
+
+    period_end = timezone.now()
+    last_digest = Digest.objects.first()
+    period_start = last_digest.period_end if last_digest else period_end - timezone.timedelta(days=1)
+
+    # Emails and period of digest are saved together, so failed digest is sent again for same period
+    with transaction.atomic():
+        sent = send_subscription_digest(period_start, period_end, MAILING_CHUNK_SIZE)
+        Digest.objects.create(period_start=period_start, period_end=period_end, sent=sent)
+    logger.info(f"Digest of course updates {period_start} - {period_end} - emails to outbox: {sent}")
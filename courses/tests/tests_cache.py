@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from courses.models import Course, Lesson
+from courses.views import CourseViewSet, LessonListAPIView
+from users.models import User
+from users.views import SubscribeAPIView
+
+
+@override_settings(CACHE_ENABLED=True)
+class CatalogCacheTest(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+        self.user = User.objects.create(email="test_user@test.com", password="test_PASSWORD", is_active=True)
+        self.course = Course.objects.create(
+            name="Test Course",
+            description="Test Course",
+            preview="",
+            video_url="",
+            owner=self.user,
+        )
+
+    def get_response(self, view, path: str, **kwargs):
+        request = self.factory.get(path)
+        force_authenticate(request, user=self.user)
+        return view(request, **kwargs)
+
+    def test_course_list_cache(self) -> None:
+        view = CourseViewSet.as_view({"get": "list"})
+        path = reverse("courses:course-list")
+
+        self.assertEqual(self.get_response(view, path).data["count"], 1)
+
+        # Only indexed query of last update for ETag, version of list is got from cache
+        with self.assertNumQueries(1):
+            response = self.get_response(view, path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        etag = response.headers["ETag"]
+
+        # Created course invalidates list
+        course = Course.objects.create(name="New Course", description="", preview="", video_url="", owner=self.user)
+        response = self.get_response(view, path)
+        self.assertEqual(response.data["count"], 2)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        # Deleted course changes ETag by version of list, last update is not changed
+        etag = response.headers["ETag"]
+        self.course.delete()
+        response = self.get_response(view, path)
+        self.assertEqual(response.data["count"], 1)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.data["results"][0]["name"], course.name)
+
+    def test_course_retrieve_cache(self) -> None:
+        view = CourseViewSet.as_view({"get": "retrieve"})
+        path = reverse("courses:course-detail", kwargs={"pk": self.course.pk})
+
+        self.assertEqual(self.get_response(view, path, pk=self.course.pk).data["lessons_count"], 0)
+
+        with self.assertNumQueries(1):
+            self.get_response(view, path, pk=self.course.pk)
+
+        # Created lesson invalidates page of its course
+        Lesson.objects.create(
+            name="Test Lesson", description="", preview="", video_url="", course=self.course, owner=self.user
+        )
+        self.assertEqual(self.get_response(view, path, pk=self.course.pk).data["lessons_count"], 1)
+
+        # Subscription invalidates page of course for user
+        subscription_path = reverse("users:subscribe", kwargs={"pk": self.course.pk})
+        self.get_response(SubscribeAPIView.as_view(), subscription_path, pk=self.course.pk)
+        self.assertEqual(self.get_response(view, path, pk=self.course.pk).data["subscription"], True)
+
+    def test_lesson_list_cache(self) -> None:
+        view = LessonListAPIView.as_view()
+        path = reverse("courses:lesson-list")
+
+        self.assertEqual(self.get_response(view, path).data["count"], 0)
+
+        lesson = Lesson.objects.create(
+            name="Test Lesson", description="", preview="", video_url="", course=self.course, owner=self.user
+        )
+        self.assertEqual(self.get_response(view, path).data["count"], 1)
+
+        lesson.delete()
+        self.assertEqual(self.get_response(view, path).data["count"], 0)
@@ -0,0 +1,260 @@
+from unittest.mock import Mock, patch
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from courses.models import Course, Lesson, Mailing
+from courses.paginators import KeysetPaginator
+from courses.tasks import mailing_to_course_subscribers
+from courses.views import CourseViewSet
+from users.models import Subscription, User
+
+
+class CourseTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+
+        self.user = User.objects.create(email="test_user@test.com", password="test_PASSWORD", is_active=True)
+        self.course = Course.objects.create(
+            name="Test Course",
+            description="Test Course",
+            preview="",
+            video_url="",
+            owner=self.user,
+        )
+        for number in range(3):
+            Lesson.objects.create(
+                name=f"Test Lesson {number}",
+                description="Test Lesson",
+                preview="",
+                video_url="",
+                course=self.course,
+                owner=self.user,
+            )
+        Subscription.objects.create(user=self.user, course=self.course, subscription=True)
+
+        self.retrieve_view = CourseViewSet.as_view({"get": "retrieve"})
+        self.list_view = CourseViewSet.as_view({"get": "list"})
+
+    def test_course_retrieve_queries(self) -> None:
+
+        request = self.factory.get(reverse("courses:course-detail", kwargs={"pk": self.course.id}))
+        force_authenticate(request, user=self.user)
+
+        # ETag of course, course with annotations and prefetch of lessons
+        with self.assertNumQueries(3):
+            response = self.retrieve_view(request, pk=self.course.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["lessons_count"], 3)
+        self.assertEqual(len(response.data["lessons"]), 3)
+        self.assertEqual(response.data["subscription"], True)
+
+    def test_course_retrieve_without_subscription(self) -> None:
+
+        other_user = User.objects.create(email="other_user@test.com", password="test_PASSWORD", is_active=True)
+        request = self.factory.get(reverse("courses:course-detail", kwargs={"pk": self.course.id}))
+        force_authenticate(request, user=other_user)
+        response = self.retrieve_view(request, pk=self.course.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["lessons_count"], 3)
+        self.assertEqual(response.data["subscription"], False)
+
+    def test_course_list_cursor_pagination(self) -> None:
+
+        for name in ("A Course", "B Course", "C Course"):
+            Course.objects.create(name=name, description="", preview="", video_url="", owner=self.user)
+
+        request = self.factory.get(reverse("courses:course-list"), {"pagination": "cursor", "page_size": 2})
+        force_authenticate(request, user=self.user)
+        response = self.list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual([course["name"] for course in response.data["results"]], ["A Course", "B Course"])
+
+        # Course inserted before cursor position doesn't shift next page
+        Course.objects.create(name="0 Course", description="", preview="", video_url="", owner=self.user)
+
+        request = self.factory.get(response.data["next"])
+        force_authenticate(request, user=self.user)
+        response = self.list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([course["name"] for course in response.data["results"]], ["C Course", "Test Course"])
+        self.assertIsNone(response.data["next"])
+
+    def test_course_list_invalid_cursor(self) -> None:
+
+        search_view = CourseViewSet.as_view({"get": "search"}, **CourseViewSet.search.kwargs)
+        cursors = (
+            ("courses:course-list", ["A Course", "id"], self.list_view),
+            ("courses:course-list", [None, 1], self.list_view),
+            ("courses:course-search", ["rank", 1], search_view),
+            ("courses:course-list", "not-base64", self.list_view),
+        )
+        for name, position, view in cursors:
+            with self.subTest(position=position):
+                paginator = KeysetPaginator()
+                cursor = position if isinstance(position, str) else paginator.encode_cursor(position)
+                request = self.factory.get(reverse(name), {"cursor": cursor, "q": "course"})
+                force_authenticate(request, user=self.user)
+                response = view(request)
+
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_course_list_etag_without_shared_cache(self) -> None:
+
+        # Versions of lists in local memory cache are not shared between processes, so list has no ETag
+        request = self.factory.get(reverse("courses:course-list"))
+        force_authenticate(request, user=self.user)
+        response = self.list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response.headers)
+
+    def test_course_retrieve_not_modified(self) -> None:
+
+        path = reverse("courses:course-detail", kwargs={"pk": self.course.id})
+        request = self.factory.get(path)
+        force_authenticate(request, user=self.user)
+        response = self.retrieve_view(request, pk=self.course.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response.headers["ETag"]
+
+        # Validators are checked with one query without serialization of course
+        request = self.factory.get(path, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.user)
+        with self.assertNumQueries(1):
+            response = self.retrieve_view(request, pk=self.course.id)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Updated lesson changes ETag of course
+        lesson = self.course.lesson_set.first()
+        lesson.name = "Updated Lesson"
+        lesson.save()
+
+        request = self.factory.get(path, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.user)
+        response = self.retrieve_view(request, pk=self.course.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_course_search(self) -> None:
+
+        Course.objects.create(
+            name="Программирование на Python", description="Основы языка", preview="", video_url="", owner=self.user
+        )
+        Course.objects.create(
+            name="Базы данных", description="Программирование запросов", preview="", video_url="", owner=self.user
+        )
+        Course.objects.create(name="Рисование", description="Акварель", preview="", video_url="", owner=self.user)
+
+        # Kwargs of action as in router
+        search_view = CourseViewSet.as_view({"get": "search"}, **CourseViewSet.search.kwargs)
+        request = self.factory.get(reverse("courses:course-search"), {"q": "программирования", "page_size": 1})
+        force_authenticate(request, user=self.user)
+        response = search_view(request)
+
+        # Match in name is ranked above match in description
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([course["name"] for course in response.data["results"]], ["Программирование на Python"])
+
+        request = self.factory.get(response.data["next"])
+        force_authenticate(request, user=self.user)
+        response = search_view(request)
+
+        self.assertEqual([course["name"] for course in response.data["results"]], ["Базы данных"])
+        self.assertIsNone(response.data["next"])
+
+    def test_course_search_without_query(self) -> None:
+
+        search_view = CourseViewSet.as_view({"get": "search"}, **CourseViewSet.search.kwargs)
+        cursor = KeysetPaginator().encode_cursor([0.5, 1])
+        for params in ({}, {"q": ""}, {"q": "  "}, {"cursor": cursor}):
+            with self.subTest(params=params):
+                request = self.factory.get(reverse("courses:course-search"), params)
+                force_authenticate(request, user=self.user)
+                response = search_view(request)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["results"], [])
+                self.assertIsNone(response.data["next"])
+
+        # Invalid cursor without query
+        cursor = KeysetPaginator().encode_cursor(["a", 1])
+        request = self.factory.get(reverse("courses:course-search"), {"cursor": cursor})
+        force_authenticate(request, user=self.user)
+        self.assertEqual(search_view(request).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_course_autocomplete(self) -> None:
+
+        Course.objects.create(name="Python для начинающих", description="", preview="", video_url="", owner=self.user)
+        Course.objects.create(name="Продвинутый Python", description="", preview="", video_url="", owner=self.user)
+        Course.objects.create(name="Рисование", description="", preview="", video_url="", owner=self.user)
+
+        autocomplete_view = CourseViewSet.as_view({"get": "autocomplete"})
+        request = self.factory.get(reverse("courses:course-autocomplete"), {"q": "pyth"})
+        force_authenticate(request, user=self.user)
+        response = autocomplete_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(course["name"] for course in response.data), ["Python для начинающих", "Продвинутый Python"]
+        )
+
+        # Without shared cache LRU cache is not used
+        with self.assertNumQueries(1):
+            autocomplete_view(request)
+
+        with override_settings(CACHE_ENABLED=True):
+            response = autocomplete_view(request)
+
+            # Hot query is returned from LRU cache
+            with self.assertNumQueries(0):
+                cached_response = autocomplete_view(request)
+            self.assertEqual(cached_response.data, response.data)
+
+            # New course changes version of course lists in key of LRU cache
+            Course.objects.create(name="Python и рисование", description="", preview="", video_url="", owner=self.user)
+            response = autocomplete_view(request)
+
+            self.assertEqual(len(response.data), 3)
+
+    @patch.object(mailing_to_course_subscribers, "apply_async")
+    def test_course_update_mailing_debounce(self, mock_apply_async: Mock) -> None:
+
+        update_view = CourseViewSet.as_view({"patch": "partial_update"})
+
+        def update_course(description: str) -> None:
+            request = self.factory.patch(
+                reverse("courses:course-detail", kwargs={"pk": self.course.id}),
+                data={"description": description},
+                format="json",
+            )
+            force_authenticate(request, user=self.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = update_view(request, pk=self.course.id)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for number in range(3):
+            update_course(f"Update {number}")
+
+        # Updates are coalesced to one scheduled mailing
+        mailing = Mailing.objects.get(course=self.course)
+        self.assertEqual(mailing.status, "SCHEDULED")
+        mock_apply_async.assert_called_once()
+        self.assertEqual(mock_apply_async.call_args.args[0], (self.course.id, mailing.pk))
+
+        # Update after start of mailing schedules new mailing
+        with patch("courses.tasks.dispatch_mailing"):
+            mailing_to_course_subscribers(self.course.id, mailing.pk)
+        update_course("Update after mailing")
+
+        self.assertEqual(mock_apply_async.call_count, 2)
+        self.assertEqual(Mailing.objects.filter(course=self.course, status="SCHEDULED").count(), 1)
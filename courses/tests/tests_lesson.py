@@ -3,8 +3,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 
+from courses.models import Lesson
 from courses.views import (LessonCreateAPIView, LessonDestroyAPIView, LessonListAPIView, LessonRetrieveAPIView,
-                           LessonUpdateAPIView)
+                           LessonSearchAPIView, LessonUpdateAPIView)
 from users.models import User
 
 
@@ -85,6 +86,47 @@ class LessonTest(APITestCase):
         self.assertEqual(retrieve_response.status_code, status.HTTP_200_OK)
         self.assertEqual(retrieve_response.data["name"], "Test_1")
 
+    def test_lesson_retrieve_not_modified(self) -> None:
+
+        # Set "updated_at" of lesson from fixtures
+        Lesson.objects.get(pk=1).save()
+
+        force_authenticate(self.retrieve_request, user=self.owner)
+        retrieve_response = self.retrieve_view(self.retrieve_request, pk=1)
+
+        self.assertEqual(retrieve_response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", retrieve_response.headers)
+
+        request = self.factory.get(
+            reverse("courses:lesson-get", kwargs={"pk": 1}),
+            HTTP_IF_NONE_MATCH=retrieve_response.headers["ETag"],
+        )
+        force_authenticate(request, user=self.owner)
+        response = self.retrieve_view(request, pk=1)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_lesson_search(self) -> None:
+
+        request = self.factory.get(reverse("courses:lesson-search"), {"q": "Test_1"})
+        force_authenticate(request, user=self.owner)
+        response = LessonSearchAPIView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([lesson["name"] for lesson in response.data["results"]], ["Test_1"])
+
+    def test_lesson_search_without_query(self) -> None:
+
+        for params in ({}, {"q": "  "}):
+            with self.subTest(params=params):
+                request = self.factory.get(reverse("courses:lesson-search"), params)
+                force_authenticate(request, user=self.owner)
+                response = LessonSearchAPIView.as_view()(request)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["results"], [])
+                self.assertIsNone(response.data["next"])
+
     def test_lesson_create(self) -> None:
 
         force_authenticate(self.create_request, user=self.owner)
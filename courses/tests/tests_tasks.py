@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase
+
+from config.celery import app
+from courses.models import Course, Digest, Mailing, MailingChunk
+from courses.tasks import mailing_to_course_subscribers, resume_mailing, send_daily_digest
+from users.models import OutboxEmail, Subscription, User
+from users.tasks import send_outbox_emails
+
+
+@patch("courses.tasks.MAILING_CHUNK_SIZE", 2)
+class MailingTest(TestCase):
+
+    def setUp(self) -> None:
+        # Subtasks are executed in test process
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        self.owner = User.objects.create(email="owner@test.com", password="test_PASSWORD", is_active=True)
+        self.course = Course.objects.create(
+            name="Test Course", description="Test Course", preview="", video_url="", owner=self.owner
+        )
+        for number in range(5):
+            user = User.objects.create(email=f"user_{number}@test.com", password="test_PASSWORD", is_active=True)
+            Subscription.objects.create(user=user, course=self.course, subscription=number != 0)
+
+    def test_mailing_to_course_subscribers(self) -> None:
+
+        # Banned user doesn't get mailing
+        user = User.objects.create(email="banned@test.com", password="test_PASSWORD", is_active=False)
+        Subscription.objects.create(user=user, course=self.course, subscription=True)
+
+        mailing_to_course_subscribers(self.course.pk)
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["user_1@test.com", "user_2@test.com", "user_3@test.com", "user_4@test.com"],
+        )
+        self.assertEqual(mail.outbox[0].subject, "Обновление курса Test Course")
+
+        mailing = Mailing.objects.get(course=self.course)
+        self.assertEqual(mailing.status, "DONE")
+        self.assertEqual(mailing.mailingchunk_set.count(), 2)
+        self.assertEqual(mailing.get_progress(), {"sent": 4, "failed": 0, "pending": 0})
+
+    def test_mailing_progress_by_outbox(self) -> None:
+
+        # Emails of mailing are saved to outbox, then one of them is sent and one fails after last attempt
+        mailing_to_course_subscribers(self.course.pk)
+        mailing = Mailing.objects.get(course=self.course)
+        self.assertEqual(mailing.status, "DONE")
+        self.assertEqual(mailing.get_progress(), {"sent": 0, "failed": 0, "pending": 4})
+
+        OutboxEmail.objects.filter(to="user_1@test.com").update(status="FAILED")
+        OutboxEmail.objects.filter(to="user_2@test.com").update(status="SENT")
+        self.assertEqual(mailing.get_progress(), {"sent": 1, "failed": 1, "pending": 2})
+
+    def test_resume_mailing(self) -> None:
+
+        with patch("courses.tasks.dispatch_mailing"):
+            mailing_to_course_subscribers(self.course.pk)
+        mailing = Mailing.objects.get(course=self.course)
+        self.assertEqual(mailing.get_progress(), {"sent": 0, "failed": 0, "pending": 4})
+
+        # First email of first chunk was saved to outbox and sent before crash of worker
+        first_chunk = mailing.mailingchunk_set.first()
+        MailingChunk.objects.filter(pk=first_chunk.pk).update(last_sent_id=first_chunk.first_id)
+        OutboxEmail.objects.create(subject="", body="", to="user_1@test.com", status="SENT", mailing_chunk=first_chunk)
+
+        resume_mailing(mailing.pk)
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertNotIn("user_1@test.com", [message.to[0] for message in mail.outbox])
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, "DONE")
+        self.assertEqual(mailing.get_progress(), {"sent": 4, "failed": 0, "pending": 0})
+
+    def test_mailing_start_after_crash(self) -> None:
+
+        self.assertTrue(mailing_to_course_subscribers.acks_late)
+        mailing = Mailing.objects.create(course=self.course, status="SCHEDULED")
+
+        # Crash of worker during creation of chunks rolls back start of mailing
+        with patch("courses.src.mailing.MailingChunk.objects.bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                mailing_to_course_subscribers(self.course.pk, mailing.pk)
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, "SCHEDULED")
+        self.assertFalse(mailing.mailingchunk_set.exists())
+
+        # Task is delivered again, chunks are saved with start of mailing, then crash before dispatch of chunks
+        with patch("courses.tasks.dispatch_mailing", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                mailing_to_course_subscribers(self.course.pk, mailing.pk)
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, "IN_PROGRESS")
+        self.assertEqual(mailing.total, 4)
+
+        # Next delivery sends pending chunks of started mailing
+        with self.captureOnCommitCallbacks(execute=True):
+            mailing_to_course_subscribers(self.course.pk, mailing.pk)
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 4)
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, "DONE")
+
+    def test_daily_digest(self) -> None:
+
+        digest_user = User.objects.create(
+            email="digest_user@test.com", password="test_PASSWORD", is_active=True, notification_mode="DIGEST"
+        )
+        other_course = Course.objects.create(
+            name="Other Course", description="Other Course", preview="", video_url="", owner=self.owner
+        )
+        Subscription.objects.create(user=digest_user, course=self.course, subscription=True)
+        Subscription.objects.create(user=digest_user, course=other_course, subscription=True)
+
+        # Immediate mailing is not sent to user with digest mode
+        mailing_to_course_subscribers(self.course.pk)
+        send_outbox_emails()
+        self.assertNotIn("digest_user@test.com", [message.to[0] for message in mail.outbox])
+        mail.outbox.clear()
+
+        send_daily_digest()
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["digest_user@test.com"])
+        self.assertIn("Other Course", mail.outbox[0].body)
+        self.assertIn("Test Course", mail.outbox[0].body)
+
+        # Next digest has only courses updated after previous one
+        send_daily_digest()
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Digest.objects.count(), 2)
@@ -12,6 +12,8 @@ router.register(r"course", views.CourseViewSet, basename="course")
 urlpatterns = [
     path("lesson/create/", views.LessonCreateAPIView.as_view(), name="lesson-create"),
     path("lesson/", views.LessonListAPIView.as_view(), name="lesson-list"),
+    path("lesson/search/", views.LessonSearchAPIView.as_view(), name="lesson-search"),
+    path("lesson/autocomplete/", views.LessonAutocompleteAPIView.as_view(), name="lesson-autocomplete"),
     path("lesson/<int:pk>/", views.LessonRetrieveAPIView.as_view(), name="lesson-get"),
     path("lesson/<int:pk>/update/", views.LessonUpdateAPIView.as_view(), name="lesson-update"),
     path("lesson/<int:pk>/delete/", views.LessonDestroyAPIView.as_view(), name="lesson-delete"),
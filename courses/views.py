@@ -1,12 +1,41 @@
+from functools import partial
+
+from django.db.models import Count, Exists, OuterRef, QuerySet
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, serializers, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from users.models import Subscription
 from users.permissions import IsModer, IsOwner
 
 from .models import Course, Lesson
-from .paginators import CustomCoursesPaginator
+from .paginators import CustomCoursesPaginator, SearchKeysetPaginator
 from .serializers import CourseRetrieveSerializer, CourseSerializer, LessonSerializer
-from .tasks import mailing_to_course_subscribers
+from .src import cache, conditional
+from .src.search import AUTOCOMPLETE_LIMIT, autocomplete_names, search_queryset
+from .tasks import schedule_course_mailing
+
+search_query_param = openapi.Parameter(
+    "q", openapi.IN_QUERY, description="Текст запроса", type=openapi.TYPE_STRING, required=True
+)
+limit_query_param = openapi.Parameter(
+    "limit", openapi.IN_QUERY, description="Количество результатов", type=openapi.TYPE_INTEGER
+)
+
+
+def get_autocomplete_response(request: Request, model: type[Course | Lesson]) -> Response:
+    """Response with list of names for typeahead by query params "q" and "limit" of request"""
+
+    limit = request.query_params.get("limit", "")
+    limit = int(limit) if limit.isdigit() and int(limit) > 0 else AUTOCOMPLETE_LIMIT
+    return Response(autocomplete_names(model, request.query_params.get("q", ""), limit))
 
 
 class CourseViewSet(viewsets.ModelViewSet):
@@ -14,6 +43,55 @@ class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     pagination_class = CustomCoursesPaginator
 
+    def get_queryset(self) -> QuerySet:
+        """
+        For retrieve action annotate lessons count and subscription flag of request user
+        and prefetch lessons, so course page is built with two queries
+        """
+
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            user_subscription = Subscription.objects.filter(
+                course=OuterRef("pk"), user_id=self.request.user.pk, subscription=True
+            )
+            queryset = queryset.annotate(
+                lessons_count=Count("lesson"), is_subscribed=Exists(user_subscription)
+            ).prefetch_related("lesson_set")
+        return queryset
+
+    @method_decorator(condition(etag_func=conditional.course_list_etag))
+    def list(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return cache.get_cached_response(
+            cache.course_list_key(request), partial(super().list, request, *args, **kwargs)
+        )
+
+    @method_decorator(condition(etag_func=conditional.course_detail_etag))
+    def retrieve(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return cache.get_cached_response(
+            cache.course_detail_key(kwargs["pk"], request.user.pk), partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    @swagger_auto_schema(manual_parameters=[search_query_param])
+    @action(detail=False, methods=["get"], pagination_class=SearchKeysetPaginator)
+    def search(self, request: Request) -> Response:
+        """
+        Full text search of courses by name and description ordered by rank
+        """
+
+        queryset = search_queryset(self.get_queryset(), request.query_params.get("q", ""))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(manual_parameters=[search_query_param, limit_query_param])
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request: Request) -> Response:
+        """
+        Names of courses similar to query for typeahead
+        """
+
+        return get_autocomplete_response(request, Course)
+
     def perform_create(self, serializer: CourseSerializer) -> None:
         serializer.save(owner=self.request.user)
 
@@ -30,6 +108,8 @@ class CourseViewSet(viewsets.ModelViewSet):
             self.permission_classes = [IsAuthenticated]
         elif self.action == "retrieve":
             self.permission_classes = [IsAuthenticated]
+        elif self.action in ("search", "autocomplete"):
+            self.permission_classes = [IsAuthenticated]
         elif self.action == "update":
             self.permission_classes = [IsAuthenticated, IsModer | IsOwner]
         elif self.action == "partial_update":
@@ -40,7 +120,7 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer: CourseSerializer) -> None:
         course = serializer.save()
-        mailing_to_course_subscribers.delay(course.pk)
+        schedule_course_mailing(course.pk)
 
 
 class LessonCreateAPIView(generics.CreateAPIView):
@@ -65,7 +145,41 @@ class LessonListAPIView(generics.ListAPIView):
     pagination_class = CustomCoursesPaginator
     permission_classes = [AllowAny]
 
+    @method_decorator(condition(etag_func=conditional.lesson_list_etag))
+    def list(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return cache.get_cached_response(
+            cache.lesson_list_key(request), partial(super().list, request, *args, **kwargs)
+        )
+
+
+@method_decorator(name="get", decorator=swagger_auto_schema(manual_parameters=[search_query_param]))
+class LessonSearchAPIView(generics.ListAPIView):
+    """
+    Full text search of lessons by name and description ordered by rank.  For authenticated users
+    """
+
+    serializer_class = LessonSerializer
+    queryset = Lesson.objects.all()
+    pagination_class = SearchKeysetPaginator
+
+    def get_queryset(self) -> QuerySet:
+        return search_queryset(super().get_queryset(), self.request.query_params.get("q", ""))
+
+
+class LessonAutocompleteAPIView(APIView):
+    """
+    Names of lessons similar to query for typeahead.  For authenticated users
+    """
+
+    @swagger_auto_schema(manual_parameters=[search_query_param, limit_query_param])
+    def get(self, request: Request) -> Response:
+        return get_autocomplete_response(request, Lesson)
+
 
+@method_decorator(
+    name="get",
+    decorator=condition(etag_func=conditional.lesson_detail_etag, last_modified_func=conditional.lesson_last_modified),
+)
 class LessonRetrieveAPIView(generics.RetrieveAPIView):
     """
     Get Lesson by lesson id.  For authenticated users
@@ -1,8 +1,14 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_filter = ("id", "email", "is_staff")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "to", "subject", "status", "priority", "attempts", "next_attempt_at")
+    list_filter = ("status", "priority")
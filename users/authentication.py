@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from .models import User
+from .src.tokens import AUTH_TIME_CLAIM, USER_CLAIMS, get_user_from_claims, is_claims_stale
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication with user built from claims of token without query of user.
+    User is loaded from database if Redis cache is disabled (stale claims can't be checked in all processes),
+    token has no claims of user or claims are marked stale by deactivation, deletion or change of role of user
+    """
+
+    def get_user(self, validated_token: Token) -> User:
+        if not settings.CACHE_ENABLED or any(
+            claim not in validated_token for claim in (api_settings.USER_ID_CLAIM, AUTH_TIME_CLAIM, *USER_CLAIMS)
+        ):
+            return super().get_user(validated_token)
+
+        user_pk = validated_token[api_settings.USER_ID_CLAIM]
+        if not validated_token["is_active"] or is_claims_stale(user_pk, validated_token[AUTH_TIME_CLAIM]):
+            return super().get_user(validated_token)
+        return get_user_from_claims(user_pk, validated_token)
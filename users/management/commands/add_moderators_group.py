@@ -2,6 +2,8 @@ from django.contrib.auth.models import Group
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management import BaseCommand
 
+from users.src.roles import MODERATORS_GROUP_NAME
+
 
 class Command(BaseCommand):
     help = " Add moderators group"
@@ -10,10 +12,10 @@ class Command(BaseCommand):
         """Check if group is exist, and add Moderators group, add permissions"""
 
         try:
-            group = Group.objects.get(name="Модераторы")
+            group = Group.objects.get(name=MODERATORS_GROUP_NAME)
             print(f"Группа {group.name} уже существует")
         except ObjectDoesNotExist:
-            moderators_group = Group.objects.create(name="Модераторы")
+            moderators_group = Group.objects.create(name=MODERATORS_GROUP_NAME)
             moderators_group.save()
             # Add permissions
 
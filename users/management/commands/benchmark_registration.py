@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import OutboxEmail, User
+from users.src.locks import advisory_lock
+
+BENCHMARK_EMAIL_PREFIX = "benchmark_user_"
+
+
+class Command(BaseCommand):
+    help = "Benchmark of registration endpoint"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--count", type=int, default=50, help="Count of registrations")
+
+    def handle(self, *args, **options) -> None:
+        """
+        Method to send registration requests and print latency and throughput.
+        Each registration is committed like in production, so callbacks after commit (start of celery task
+        of email sending) are measured too. Created users and their emails are deleted after benchmark.
+        Emails of benchmark users are not sent: lock of outbox is held until emails are deleted, so workers
+        skip sending, and emails sent in this process go to local memory backend
+        """
+
+        with advisory_lock("email_outbox") as acquired:
+            if not acquired:
+                raise CommandError("Emails of outbox are sending by worker, run benchmark later")
+            with override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"):
+                durations = self.register_users(options["count"])
+
+        if not durations:
+            return
+
+        durations.sort()
+        p95 = durations[max(int(len(durations) * 0.95) - 1, 0)]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Registrations: {len(durations)} - mean: {statistics.mean(durations) * 1000:.1f} ms, "
+                f"p95: {p95 * 1000:.1f} ms, throughput: {len(durations) / sum(durations):.1f} req/s"
+            )
+        )
+
+    def register_users(self, count: int) -> list[float]:
+        """
+        Method to send registration requests, users and their emails are deleted after requests
+
+        :param count: count of registrations
+        :return: durations of requests in seconds
+        """
+
+        client = APIClient()
+        durations = []
+
+        try:
+            for number in range(count):
+                data = {
+                    "email": f"{BENCHMARK_EMAIL_PREFIX}{number}@test.com",
+                    "password1": "benchmark_PASSWORD",
+                    "password2": "benchmark_PASSWORD",
+                    "phone": None,
+                    "country": None,
+                    "avatar": None,
+                }
+                start = time.perf_counter()
+                response = client.post(
+                    reverse("users:register"), data=data, format="json", HTTP_HOST=settings.ALLOWED_HOSTS[0]
+                )
+                durations.append(time.perf_counter() - start)
+                if response.status_code != 201:
+                    self.stdout.write(self.style.ERROR(f"Registration error: {response.status_code} {response.data}"))
+                    break
+        finally:
+            OutboxEmail.objects.filter(to__startswith=BENCHMARK_EMAIL_PREFIX).delete()
+            User.objects.filter(email__startswith=BENCHMARK_EMAIL_PREFIX).delete()
+        return durations
@@ -0,0 +1,37 @@
+from django.core.management import BaseCommand
+
+from config.settings import FAKE_STRIPE_FAILURE_RATE, FAKE_STRIPE_LATENCY
+from users.src.fake_stripe import FakeStripe, make_fake_stripe_server
+
+
+class Command(BaseCommand):
+    help = "Run local stand-in of Stripe API for load testing"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--host", default="127.0.0.1", help="Host of server")
+        parser.add_argument("--port", type=int, default=12111, help="Port of server")
+        parser.add_argument("--latency", type=float, default=FAKE_STRIPE_LATENCY, help="Latency of calls, seconds")
+        parser.add_argument(
+            "--failure-rate", type=float, default=FAKE_STRIPE_FAILURE_RATE, help="Rate of failed calls from 0 to 1"
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Method to run HTTP server of Stripe emulator. Project uses it with STRIPE_API_BASE=http://<host>:<port>,
+        checkout session is paid by opening its url
+        """
+
+        fake_stripe = FakeStripe(options["latency"], options["failure_rate"])
+        server = make_fake_stripe_server(options["host"], options["port"], fake_stripe)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fake Stripe API on http://{options['host']}:{server.server_port} - "
+                f"latency: {options['latency']} s, failure rate: {options['failure_rate']}"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
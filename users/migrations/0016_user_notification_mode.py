@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0015_alter_payment_paid_course_alter_payment_paid_lesson"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="notification_mode",
+            field=models.CharField(
+                choices=[("IMMEDIATE", "сразу"), ("DIGEST", "ежедневная сводка")],
+                default="IMMEDIATE",
+                max_length=9,
+                verbose_name="Уведомления об обновлениях",
+            ),
+        ),
+    ]
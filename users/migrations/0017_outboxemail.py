@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0016_user_notification_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("subject", models.CharField(max_length=255, verbose_name="Тема")),
+                ("body", models.TextField(verbose_name="Текст")),
+                ("to", models.EmailField(max_length=254, verbose_name="Получатель")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "ожидает отправки"), ("SENT", "отправлено"), ("FAILED", "не отправлено")],
+                        default="PENDING",
+                        max_length=7,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Количество попыток")),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата следующей попытки"),
+                ),
+                ("last_error", models.TextField(blank=True, default="", verbose_name="Последняя ошибка")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Дата отправки")),
+            ],
+            options={
+                "verbose_name": "письмо",
+                "verbose_name_plural": "письма",
+                "ordering": ["next_attempt_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "PENDING")),
+                        fields=["next_attempt_at"],
+                        name="outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
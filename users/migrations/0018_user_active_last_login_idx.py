@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0017_outboxemail"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["is_active", "last_login"], name="user_active_last_login_idx"),
+        ),
+    ]
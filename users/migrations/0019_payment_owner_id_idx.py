@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_digest"),
+        ("users", "0018_user_active_last_login_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["owner", "-id"], name="payment_owner_id_idx"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_digest"),
+        ("users", "0019_payment_owner_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                condition=models.Q(("payment_method", "TRANSFER"), ("payment_status", "CREATED")),
+                fields=["created_date"],
+                name="payment_pending_transfer_idx",
+            ),
+        ),
+    ]
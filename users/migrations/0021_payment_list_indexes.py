@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_stripe_prices"),
+        ("users", "0020_payment_pending_transfer_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["payment_date", "id"], name="payment_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["paid_course", "payment_date", "id"], name="payment_course_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["paid_lesson", "payment_date", "id"], name="payment_lesson_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["payment_method", "payment_date", "id"], name="payment_method_date_idx"),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_remove_mailingchunk_counters"),
+        ("users", "0021_payment_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxemail",
+            name="mailing_chunk",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="courses.mailingchunk",
+                verbose_name="Часть рассылки",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_remove_mailingchunk_counters"),
+        ("users", "0022_outboxemail_mailing_chunk"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="outboxemail",
+            name="outbox_pending_idx",
+        ),
+        migrations.AlterField(
+            model_name="outboxemail",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "ожидает отправки"),
+                    ("SENDING", "отправляется"),
+                    ("SENT", "отправлено"),
+                    ("FAILED", "не отправлено"),
+                ],
+                default="PENDING",
+                max_length=7,
+                verbose_name="Статус",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxemail",
+            index=models.Index(
+                condition=models.Q(("status__in", ["PENDING", "SENDING"])),
+                fields=["next_attempt_at"],
+                name="outbox_pending_idx",
+            ),
+        ),
+    ]
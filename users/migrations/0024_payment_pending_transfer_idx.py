@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_remove_mailingchunk_counters"),
+        ("users", "0023_outbox_sending"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="payment",
+            name="payment_pending_transfer_idx",
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                condition=models.Q(("payment_method", "TRANSFER"), ("payment_status", "CREATED")),
+                fields=["created_date", "id"],
+                name="payment_pending_transfer_idx",
+            ),
+        ),
+    ]
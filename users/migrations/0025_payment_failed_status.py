@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0024_payment_pending_transfer_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="payment_status",
+            field=models.CharField(
+                choices=[("CREATED", "создан"), ("PAID", "оплачен"), ("FAILED", "ошибка создания перевода")],
+                default="CREATED",
+                max_length=8,
+                verbose_name="Статус оплаты",
+            ),
+        ),
+    ]
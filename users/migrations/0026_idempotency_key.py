@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0025_payment_failed_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("path", models.CharField(max_length=255, verbose_name="Путь запроса")),
+                ("key", models.CharField(max_length=64, verbose_name="Хэш ключа")),
+                ("request_hash", models.CharField(max_length=64, verbose_name="Хэш данных запроса")),
+                (
+                    "response_status",
+                    models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Статус ответа"),
+                ),
+                ("response_data", models.JSONField(blank=True, null=True, verbose_name="Данные ответа")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ключ идемпотентности",
+                "verbose_name_plural": "ключи идемпотентности",
+                "indexes": [models.Index(fields=["created_at"], name="idempotency_created_at_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("owner", "path", "key"), name="idempotency_key_unique")
+                ],
+            },
+        ),
+    ]
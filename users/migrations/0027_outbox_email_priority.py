@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_remove_mailingchunk_counters"),
+        ("users", "0026_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="outboxemail",
+            name="outbox_pending_idx",
+        ),
+        migrations.AddField(
+            model_name="outboxemail",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "высокий"), (1, "обычный")], default=1, verbose_name="Приоритет"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxemail",
+            index=models.Index(
+                condition=models.Q(("status__in", ["PENDING", "SENDING"])),
+                fields=["priority", "next_attempt_at"],
+                name="outbox_pending_idx",
+            ),
+        ),
+    ]
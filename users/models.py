@@ -1,12 +1,16 @@
-from datetime import datetime, timezone
+import random
+from datetime import datetime, timedelta, timezone
 
 from django.contrib.auth.models import AbstractUser
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils.timezone import now
 from rest_framework.serializers import ValidationError
 
-from config.settings import STRIPE_API_KEY
-from courses.models import Course, Lesson
-from users.src.transfer_api_service import StripeAPIService
+from config.settings import (EMAIL_HOST_USER, EMAIL_MAX_ATTEMPTS, EMAIL_MAX_RETRY_DELAY, EMAIL_RETRY_DELAY,
+                             EMAIL_SENDING_TIMEOUT)
+from courses.models import Course, Lesson, MailingChunk
+from users.src.transfer_api_service import get_transfer_service
 
 
 class User(AbstractUser):
@@ -30,8 +34,11 @@ class User(AbstractUser):
     country: country in charfield formate
     avatar: image of useer
     token: token to verification of user email
+    notification_mode: delivery of course updates, immediate email or daily digest
     """
 
+    NOTIFICATION_MODE_CHOICES = (("IMMEDIATE", "сразу"), ("DIGEST", "ежедневная сводка"))
+
     username = None
     email = models.EmailField(unique=True, verbose_name="Почта")
     phone = models.CharField(max_length=15, verbose_name="Телефон", null=True)
@@ -41,6 +48,9 @@ class User(AbstractUser):
     )
 
     token = models.CharField(max_length=100, verbose_name="Token", blank=True, null=True)
+    notification_mode = models.CharField(
+        max_length=9, choices=NOTIFICATION_MODE_CHOICES, default="IMMEDIATE", verbose_name="Уведомления об обновлениях"
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -48,16 +58,28 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    def refresh_from_db(self, using: str | None = None, fields: list | None = None, **kwargs: dict) -> None:
+        """Load all deferred fields with one query on access of one of them (user built from claims of token)"""
+
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred_fields:
+            fields = list(deferred_fields)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
     class Meta:
         verbose_name = "пользователь"
         verbose_name_plural = "пользователи"
+        indexes = [
+            # Index for ban of inactive users
+            models.Index(fields=["is_active", "last_login"], name="user_active_last_login_idx"),
+        ]
 
 
 class Payment(models.Model):
     """Model of payment"""
 
     PAYMENT_METHOD_CHOICES = (("CASH", "наличные"), ("TRANSFER", "перевод на счет"))
-    PAYMENT_STATUS_CHOICES = (("CREATED", "создан"), ("PAID", "оплачен"))
+    PAYMENT_STATUS_CHOICES = (("CREATED", "создан"), ("PAID", "оплачен"), ("FAILED", "ошибка создания перевода"))
 
     owner = models.ForeignKey(User, verbose_name="Пользователь", on_delete=models.CASCADE)
     created_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
@@ -95,9 +117,9 @@ class Payment(models.Model):
 
         if self.payment_status == "CREATED" and self.payment_method == "TRANSFER":
             transfer = self.transfer_set.first()
-            transfer_service = StripeAPIService(STRIPE_API_KEY)
+            transfer_service = get_transfer_service()
             retrieve = transfer_service.retrieve_session(transfer.session_id)
-            if retrieve.get("payment_status") == "paid":
+            if retrieve["payment_status"] == "paid":
                 self.payment_status = "PAID"
                 self.payment_date = datetime.now(timezone.utc)
 
@@ -107,6 +129,21 @@ class Payment(models.Model):
         verbose_name = "платеж"
         verbose_name_plural = "платежи"
         ordering = ["payment_date"]
+        indexes = [
+            # Index for keyset pagination of payment history of user
+            models.Index(fields=["owner", "-id"], name="payment_owner_id_idx"),
+            # Indexes for keyset pagination of payment list by date of payment with filters
+            models.Index(fields=["payment_date", "id"], name="payment_date_id_idx"),
+            models.Index(fields=["paid_course", "payment_date", "id"], name="payment_course_date_idx"),
+            models.Index(fields=["paid_lesson", "payment_date", "id"], name="payment_lesson_date_idx"),
+            models.Index(fields=["payment_method", "payment_date", "id"], name="payment_method_date_idx"),
+            # Partial index for reconciliation of pending transfers by batches ordered by date of creation
+            models.Index(
+                fields=["created_date", "id"],
+                condition=models.Q(payment_status="CREATED", payment_method="TRANSFER"),
+                name="payment_pending_transfer_idx",
+            ),
+        ]
 
         # New object must have one of fields paid_course or paid_lesson
         constraints = [
@@ -152,3 +189,113 @@ class Subscription(models.Model):
         verbose_name = "подписка"
         verbose_name_plural = "подписки"
         ordering = ["course"]
+
+
+class OutboxEmail(models.Model):
+    """
+    Model of email in outbox. Emails are saved by request handlers and tasks
+    and sent by task users.tasks.send_outbox_emails with retries
+    """
+
+    STATUS_CHOICES = (
+        ("PENDING", "ожидает отправки"),
+        ("SENDING", "отправляется"),
+        ("SENT", "отправлено"),
+        ("FAILED", "не отправлено"),
+    )
+
+    # Transactional emails are claimed before bulk mailings, so they don't wait in queue behind mailing
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_CHOICES = (
+        (PRIORITY_HIGH, "высокий"),
+        (PRIORITY_NORMAL, "обычный"),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    to = models.EmailField(verbose_name="Получатель")
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="PENDING", verbose_name="Статус")
+    priority = models.PositiveSmallIntegerField(
+        choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL, verbose_name="Приоритет"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Количество попыток")
+    next_attempt_at = models.DateTimeField(default=now, verbose_name="Дата следующей попытки")
+    last_error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+    mailing_chunk = models.ForeignKey(
+        MailingChunk, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Часть рассылки"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.to} - {self.subject} - {self.status}"
+
+    def get_message(self) -> EmailMessage:
+        return EmailMessage(subject=self.subject, body=self.body, from_email=EMAIL_HOST_USER, to=[self.to])
+
+    def mark_sending(self) -> None:
+        """Claim email for sending, email is sent again if it is not sent during EMAIL_SENDING_TIMEOUT seconds"""
+
+        self.status = "SENDING"
+        self.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=EMAIL_SENDING_TIMEOUT)
+
+    def mark_sent(self) -> None:
+        self.status = "SENT"
+        self.attempts += 1
+        self.sent_at = datetime.now(timezone.utc)
+        self.last_error = ""
+
+    def schedule_retry(self, error: Exception) -> None:
+        """Set time of next attempt with exponential backoff and jitter, or status "FAILED" after last attempt"""
+
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= EMAIL_MAX_ATTEMPTS:
+            self.status = "FAILED"
+            return
+        self.status = "PENDING"
+        delay = min(EMAIL_RETRY_DELAY * 2 ** (self.attempts - 1), EMAIL_MAX_RETRY_DELAY)
+        self.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+    class Meta:
+        verbose_name = "письмо"
+        verbose_name_plural = "письма"
+        ordering = ["next_attempt_at"]
+        indexes = [
+            # Index of emails for sending by priority, emails in sending are claimed again after timeout
+            models.Index(
+                fields=["priority", "next_attempt_at"],
+                name="outbox_pending_idx",
+                condition=models.Q(status__in=["PENDING", "SENDING"]),
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Model of idempotency key of request of user with hash of request data and saved response.
+    Key without response is request in progress
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Пользователь")
+    path = models.CharField(max_length=255, verbose_name="Путь запроса")
+    key = models.CharField(max_length=64, verbose_name="Хэш ключа")
+    request_hash = models.CharField(max_length=64, verbose_name="Хэш данных запроса")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Статус ответа")
+    response_data = models.JSONField(null=True, blank=True, verbose_name="Данные ответа")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    def __str__(self) -> str:
+        return f"{self.owner_id} - {self.path} - {self.key}"
+
+    class Meta:
+        verbose_name = "ключ идемпотентности"
+        verbose_name_plural = "ключи идемпотентности"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "path", "key"], name="idempotency_key_unique"),
+        ]
+        indexes = [
+            # Index for deletion of expired keys
+            models.Index(fields=["created_at"], name="idempotency_created_at_idx"),
+        ]
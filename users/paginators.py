@@ -0,0 +1,62 @@
+from django.db.models import Model, QuerySet, prefetch_related_objects
+from rest_framework.request import Request
+
+from courses.paginators import KeysetPaginator
+
+
+class PaymentKeysetPaginator(KeysetPaginator):
+    """Keyset paginator of payments, newest payments first. Ids of payments grow with dates of creation"""
+
+    ordering = ("-id",)
+
+
+class PaymentListKeysetPaginator(KeysetPaginator):
+    """
+    Keyset paginator of payments ordered by "payment_date" with direction from ordering query param
+    ("payment_date" or "-payment_date"). Payments without date of payment are last in ascending order
+    and first in descending order, like in Postgres. Position with null date is valid in cursor
+    """
+
+    ordering_query_param = "ordering"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list:
+        if request.query_params.get(self.ordering_query_param, "").startswith("-"):
+            self.ordering = ("-payment_date", "-id")
+        else:
+            self.ordering = ("payment_date", "id")
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_position(self, obj: Model) -> list:
+        """Position with date in ISO format with microseconds, so payments with close dates aren't skipped"""
+
+        return [obj.payment_date.isoformat() if obj.payment_date else None, obj.id]
+
+    def get_results(self, queryset: QuerySet, position: list | None, limit: int) -> list:
+        """
+        Payments with date and payments without date are selected by separate queries with conditions on indexes,
+        payments without date are selected only after end of payments with date in ascending order
+        (before them in descending order). Transfers of payments of page are prefetched once
+        """
+
+        descending = self.ordering[0].startswith("-")
+        lookups = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None).order_by(*self.ordering)
+        dated = queryset.filter(payment_date__isnull=False)
+        undated = queryset.filter(payment_date__isnull=True)
+
+        if position is None:
+            parts = [undated, dated] if descending else [dated, undated]
+        elif position[0] is None:
+            undated = undated.filter(**{f"id__{'lt' if descending else 'gt'}": position[1]})
+            parts = [undated, dated] if descending else [undated]
+        else:
+            dated = dated.filter(self.get_position_filter(position))
+            parts = [dated] if descending else [dated, undated]
+
+        results = []
+        for part in parts:
+            results += part[: limit - len(results)]
+            if len(results) >= limit:
+                break
+        prefetch_related_objects(results, *lookups)
+        return results
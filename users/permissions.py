@@ -1,13 +1,22 @@
 from rest_framework import permissions
 
+from .src.roles import is_moderator
+
 
 class IsModer(permissions.BasePermission):
 
     def has_permission(self, request, view) -> bool:
-        return request.user.groups.filter(name="Модераторы").exists()
+        return is_moderator(request.user)
 
 
 class IsOwner(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj) -> bool:
         return request.user == obj.owner
+
+
+class IsProfileOwner(permissions.BasePermission):
+    """Permission for sub-resources of user by "pk" of user in url, checked without query of user"""
+
+    def has_permission(self, request, view) -> bool:
+        return request.user.is_authenticated and str(request.user.pk) == str(view.kwargs.get("pk"))
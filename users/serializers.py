@@ -1,12 +1,17 @@
 import logging
-import os
 import secrets
+import time
 
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Payment, Transfer, User
+from .models import OutboxEmail, Payment, Transfer, User
+from .src.outbox import enqueue_emails
+from .src.roles import is_moderator
+from .src.tokens import AUTH_TIME_CLAIM
 from .validators import PaymentValidator
 
 
@@ -29,9 +34,8 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         """
         Creates a new user
         Check that password1 and password2 match
-        Create new user with fields and set password
-        Create and add token
-        Get url of email confirm and send email for user
+        Create new user with fields, password and token with one query
+        Get url of email confirm and save email for user to outbox, email is sent by celery task after commit
 
         :param validated_data: dict
         :return: user
@@ -41,39 +45,35 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             logger.warning("Passwords don't match")
             raise serializers.ValidationError("Пароль должен совпадать")
 
-        user = User.objects.create(
+        token = secrets.token_hex(16)
+        user = User(
             email=validated_data["email"],
             phone=validated_data["phone"],
             country=validated_data["country"],
             avatar=validated_data["avatar"],
             is_active=False,
             last_login=timezone.now(),
+            token=token,
         )
         user.set_password(validated_data["password1"])
-        token = secrets.token_hex(16)
-        user.token = token
-        user.save()
 
         request = self.context.get("request")
 
-        if request:
-            host = request.get_host()
-            url = f"http://{host}/users/email_confirm/{token}/"
-
-            try:
-                send_mail(
-                    subject="Добро пожаловать в нашу онлайн школу",
-                    message=f"""
-                        Спасибо что зарегистрировались в нашем сервисе!
-                        Перейдите по ссылке для подтверждения почты {url}.
-                    """,
-                    from_email=os.getenv("EMAIL_ADDRESS"),
-                    recipient_list=[user.email],
-                )
-                logger.info(f"Sending email for verification Email: {user.email}")
+        # Email is saved with user in one transaction and sent by celery task after commit
+        with transaction.atomic():
+            user.save()
 
-            except Exception as e:
-                logger.error(f"Sending email for verification Error: {e}")
+            if request:
+                host = request.get_host()
+                url = f"http://{host}/users/email_confirm/{token}/"
+
+                subject = "Добро пожаловать в нашу онлайн школу"
+                body = f"""
+                    Спасибо что зарегистрировались в нашем сервисе!
+                    Перейдите по ссылке для подтверждения почты {url}.
+                """
+                enqueue_emails([(subject, body, user.email)], priority=OutboxEmail.PRIORITY_HIGH)
+                logger.info(f"Sending email for verification Email: {user.email}")
 
         return user
 
@@ -101,11 +101,38 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class UserRetrieveSerializer(serializers.ModelSerializer):
-    payment_history = PaymentSerializer(source="payment_set.all", many=True)
+    """Serializer of user for owner. Payment history is paginated sub-resource, field "payment_history" is its url"""
+
+    payment_history = serializers.HyperlinkedIdentityField(view_name="users:user-payments", read_only=True)
 
     class Meta:
         model = User
-        fields = ["email", "first_name", "last_name", "phone", "country", "avatar", "payment_history"]
+        fields = [
+            "email",
+            "first_name",
+            "last_name",
+            "phone",
+            "country",
+            "avatar",
+            "notification_mode",
+            "payment_history",
+        ]
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer of pair of tokens with claims of user "email", "is_active", "is_moderator" and time of login,
+    claims are copied to access tokens and used for authentication without query of user
+    """
+
+    @classmethod
+    def get_token(cls, user: User) -> RefreshToken:
+        token = super().get_token(user)
+        token["email"] = user.email
+        token["is_active"] = user.is_active
+        token["is_moderator"] = is_moderator(user)
+        token[AUTH_TIME_CLAIM] = time.time()
+        return token
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
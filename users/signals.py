@@ -0,0 +1,51 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import User
+from .src.roles import invalidate_moderator_role
+from .src.tokens import mark_claims_stale
+
+
+def invalidate_role(user_pks: list[int] | set[int]) -> None:
+    """Invalidate cached role and role in claims of tokens of users"""
+
+    user_pks = list(user_pks)
+    invalidate_moderator_role(user_pks)
+    mark_claims_stale(user_pks)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_role_of_users(
+    sender: type, instance: User | Group, action: str, reverse: bool, pk_set: set | None, **kwargs: dict
+) -> None:
+    """Invalidate role of users added to group or removed from group, from user side or from group side"""
+
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        invalidate_role([instance.pk])
+    elif reverse and action in ("post_add", "post_remove"):
+        invalidate_role(pk_set)
+    elif reverse and action == "pre_clear":
+        invalidate_role(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_role_of_group_users(sender: type, instance: Group, **kwargs: dict) -> None:
+    """Invalidate role of users of renamed or deleted group"""
+
+    if instance.pk and not kwargs.get("raw"):
+        invalidate_role(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_claims_of_inactive_user(sender: type, instance: User, created: bool, **kwargs: dict) -> None:
+    """Tokens of deactivated user are checked with query of user, so user is not authenticated"""
+
+    if not created and not instance.is_active:
+        mark_claims_stale([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def invalidate_claims_of_deleted_user(sender: type, instance: User, **kwargs: dict) -> None:
+    mark_claims_stale([instance.pk])
@@ -0,0 +1,204 @@
+"""
+Local stand-in of Stripe for load testing of payment flows without real Stripe.
+FakeStripe emulates products, prices and checkout sessions in memory with configurable latency and failures.
+It is used in process by FakeStripeAPIService (settings.TRANSFER_API_SERVICE), objects are kept in memory
+of one process, or served as local HTTP server with Stripe API paths (command "run_fake_stripe")
+for web and celery processes, then StripeAPIService is used with settings.STRIPE_API_BASE.
+Ids of products and prices of stand-in are kept in memory and are not saved to courses, lessons and cache,
+so they don't replace ids of real Stripe after switch of settings
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qsl
+
+import stripe
+
+from config.settings import BASE_URL, FAKE_STRIPE_FAILURE_RATE, FAKE_STRIPE_LATENCY
+from users.src.transfer_api_service import STRIPE_CURRENCY, StripeAPIService, measure_latency
+
+
+class FakeStripeError(Exception):
+    pass
+
+
+class FakeStripe:
+    """
+    In-memory emulator of Stripe objects. Each call waits "latency" seconds and fails with probability
+    "failure_rate". Repeated calls with same idempotency key return first result
+    """
+
+    def __init__(self, latency: float = 0, failure_rate: float = 0, checkout_url: str = "") -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.checkout_url = checkout_url
+        self.objects = {}
+        self.idempotent_results = {}
+        # Registry of product and price ids of courses and lessons, instead of their fields in database
+        self.registry = {}
+        self.lock = threading.Lock()
+
+    def call(self, create_object: Callable[[], dict | None], idempotency_key: str | None = None) -> dict:
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise FakeStripeError("Fake Stripe failure")
+        with self.lock:
+            if idempotency_key is not None and idempotency_key in self.idempotent_results:
+                return self.idempotent_results[idempotency_key]
+            result = create_object()
+            if idempotency_key is not None:
+                self.idempotent_results[idempotency_key] = result
+            return result
+
+    def save(self, prefix: str, **fields: object) -> dict:
+        obj = {"id": f"{prefix}_fake_{uuid.uuid4().hex}", **fields}
+        self.objects[obj["id"]] = obj
+        return obj
+
+    def create_product(self, name: str, idempotency_key: str | None = None) -> dict:
+        return self.call(lambda: self.save("prod", object="product", name=name), idempotency_key)
+
+    def create_price(self, product: str, amount: int, currency: str, idempotency_key: str | None = None) -> dict:
+        return self.call(
+            lambda: self.save("price", object="price", product=product, unit_amount=amount, currency=currency),
+            idempotency_key,
+        )
+
+    def create_session(self, price: str, success_url: str, idempotency_key: str | None = None) -> dict:
+        def create_object() -> dict:
+            session = self.save(
+                "cs", object="checkout.session", price=price, success_url=success_url, payment_status="unpaid"
+            )
+            session["url"] = f"{self.checkout_url}/checkout/{session['id']}/"
+            return session
+
+        return self.call(create_object, idempotency_key)
+
+    def retrieve_session(self, session_id: str) -> dict | None:
+        return self.call(lambda: self.objects.get(session_id))
+
+    def pay_session(self, session_id: str) -> dict | None:
+        """Mark session as paid, like payment of customer on checkout page"""
+
+        with self.lock:
+            session = self.objects.get(session_id)
+            if session is not None:
+                session["payment_status"] = "paid"
+            return session
+
+
+@lru_cache(maxsize=1)
+def get_fake_stripe() -> FakeStripe:
+    """Emulator of process for FakeStripeAPIService"""
+
+    return FakeStripe(FAKE_STRIPE_LATENCY, FAKE_STRIPE_FAILURE_RATE, (BASE_URL or "").rstrip("/"))
+
+
+class FakeStripeAPIService(StripeAPIService):
+    """API service with Stripe emulated in process, errors of emulator are raised as Stripe connection errors"""
+
+    @property
+    def client(self) -> FakeStripe:
+        return get_fake_stripe()
+
+    @property
+    def local_registry(self) -> dict:
+        return self.client.registry
+
+    def call(self, operation: str, method: Callable, *args: object) -> stripe.StripeObject:
+        with measure_latency(operation):
+            try:
+                result = method(*args)
+            except FakeStripeError as e:
+                raise stripe.APIConnectionError(str(e))
+        if result is None:
+            raise stripe.InvalidRequestError("No such object", param="id")
+        return stripe.StripeObject.construct_from(result, self.api_key)
+
+    def retrieve_session(self, session_id: str) -> stripe.StripeObject:
+        return self.call("retrieve_session", self.client.retrieve_session, session_id)
+
+    def create_product(self, product_name: str, idempotency_key: str | None = None) -> stripe.StripeObject:
+        key = self.get_request_options(idempotency_key, "product").get("idempotency_key")
+        return self.call("create_product", self.client.create_product, product_name, key)
+
+    def create_price(self, product: str, amount: int, idempotency_key: str | None = None) -> stripe.StripeObject:
+        key = self.get_request_options(idempotency_key, "price").get("idempotency_key")
+        return self.call("create_price", self.client.create_price, product, amount, STRIPE_CURRENCY, key)
+
+    def create_session(self, price: str, idempotency_key: str | None = None) -> stripe.StripeObject:
+        key = self.get_request_options(idempotency_key, "session").get("idempotency_key")
+        return self.call("create_session", self.client.create_session, price, BASE_URL, key)
+
+
+class FakeStripeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of Stripe API paths of emulator: POST /v1/products, /v1/prices, /v1/checkout/sessions,
+    GET /v1/checkout/sessions/<id>. GET /checkout/<id>/ marks session as paid.
+    Failures of emulator are returned with status 500, so Stripe client retries request
+    """
+
+    protocol_version = "HTTP/1.1"
+    fake_stripe: FakeStripe
+
+    def do_GET(self) -> None:
+        path = self.path.strip("/").split("/")
+        if path[:3] == ["v1", "checkout", "sessions"] and len(path) == 4:
+            return self.handle_call(lambda: self.fake_stripe.retrieve_session(path[3]))
+        if path[0] == "checkout" and len(path) == 2:
+            return self.send_json(200, self.fake_stripe.pay_session(path[1]))
+        return self.send_json(404, None)
+
+    def do_POST(self) -> None:
+        params = dict(parse_qsl(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()))
+        key = self.headers.get("Idempotency-Key")
+        if self.path == "/v1/products":
+            return self.handle_call(lambda: self.fake_stripe.create_product(params.get("name"), key))
+        if self.path == "/v1/prices":
+            return self.handle_call(
+                lambda: self.fake_stripe.create_price(
+                    params.get("product"), int(params.get("unit_amount", 0)), params.get("currency"), key
+                )
+            )
+        if self.path == "/v1/checkout/sessions":
+            return self.handle_call(
+                lambda: self.fake_stripe.create_session(
+                    params.get("line_items[0][price]"), params.get("success_url"), key
+                )
+            )
+        return self.send_json(404, None)
+
+    def handle_call(self, call: Callable[[], dict | None]) -> None:
+        try:
+            self.send_json(200, call())
+        except FakeStripeError as e:
+            self.send_json(500, {"error": {"type": "api_error", "message": str(e)}})
+
+    def send_json(self, status: int, data: dict | None) -> None:
+        if data is None:
+            status, data = 404, {"error": {"type": "invalid_request_error", "message": "No such object"}}
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: tuple) -> None:
+        pass
+
+
+def make_fake_stripe_server(host: str, port: int, fake_stripe: FakeStripe) -> ThreadingHTTPServer:
+    """HTTP server of emulator, url of checkout pages is address of server"""
+
+    handler = type("Handler", (FakeStripeRequestHandler,), {"fake_stripe": fake_stripe})
+    server = ThreadingHTTPServer((host, port), handler)
+    if not fake_stripe.checkout_url:
+        fake_stripe.checkout_url = f"http://{host}:{server.server_port}"
+    return server
@@ -0,0 +1,88 @@
+"""
+Idempotent requests by header "Idempotency-Key". Key of user is saved in database with hash of request data
+and response, repeated request with key gets saved response without running of view.
+Repeated request with other data gets response with status 422
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from config.settings import IDEMPOTENCY_KEY_TIMEOUT, IDEMPOTENCY_LOCK_TIMEOUT
+from users.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def get_idempotency_key(request: Request) -> str | None:
+    """Idempotency key of request unique for user, with hash of key from header of limited length"""
+
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return None
+    return f"user:{request.user.pk}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def get_request_hash(request: Request) -> str:
+    """Hash of request data independent of order of keys"""
+
+    data = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def get_idempotent_response(request: Request, get_response: Callable[[], Response]) -> Response:
+    """
+    Return saved response of request with same idempotency key of user. If key is new
+    get response and save it. Request with key in progress gets response with status 409,
+    request with key of request with other data gets response with status 422.
+    Expired keys and keys of requests in progress longer than IDEMPOTENCY_LOCK_TIMEOUT are replaced
+
+    :param request: request with header "Idempotency-Key", response isn't saved without header
+    :param get_response: function for building of response
+    :return: response
+    """
+
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return get_response()
+
+    now = timezone.now()
+    lookup = {"owner_id": request.user.pk, "path": request.path, "key": hashlib.sha256(key.encode()).hexdigest()}
+    IdempotencyKey.objects.filter(
+        Q(created_at__lt=now - timedelta(seconds=IDEMPOTENCY_KEY_TIMEOUT))
+        | Q(response_status__isnull=True, created_at__lt=now - timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT)),
+        **lookup,
+    ).delete()
+
+    request_hash = get_request_hash(request)
+    record, created = IdempotencyKey.objects.get_or_create(**lookup, defaults={"request_hash": request_hash})
+    if not created:
+        if record.request_hash != request_hash:
+            return Response(
+                {"detail": "Ключ уже использован для запроса с другими данными"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record.response_status is None:
+            return Response({"detail": "Запрос с этим ключом уже выполняется"}, status=status.HTTP_409_CONFLICT)
+        return Response(record.response_data, status=record.response_status)
+
+    try:
+        response = get_response()
+    except Exception:
+        record.delete()
+        raise
+    if status.is_success(response.status_code):
+        record.response_status = response.status_code
+        record.response_data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        record.save(update_fields=["response_status", "response_data"])
+    else:
+        record.delete()
+    return response
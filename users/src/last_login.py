@@ -0,0 +1,80 @@
+"""
+Write-behind buffer of dates of last login.
+With Redis cache (settings.CACHE_ENABLED) login only writes date to Redis hash, dates are saved to database
+with one bulk query by periodic task. Without Redis date is saved to database with one UPDATE query
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+from users.models import User
+
+LAST_LOGIN_BUFFER_KEY = "users:last_login"
+
+
+@lru_cache(maxsize=1)
+def get_redis_client(location: str) -> redis.Redis:
+    return redis.Redis.from_url(location)
+
+
+def get_buffer() -> redis.Redis | None:
+    """Redis client of buffer, None if Redis cache is disabled"""
+
+    if not settings.CACHE_ENABLED:
+        return None
+    return get_redis_client(settings.CACHE_LOCATION)
+
+
+def record_last_login(user_id: int, login_date: datetime) -> None:
+    buffer = get_buffer()
+    if buffer is None:
+        User.objects.filter(pk=user_id).update(last_login=login_date)
+        return
+    buffer.hset(LAST_LOGIN_BUFFER_KEY, str(user_id), login_date.isoformat())
+
+
+def get_buffered_user_ids() -> set[int]:
+    """Ids of users with dates of login not saved to database yet"""
+
+    buffer = get_buffer()
+    if buffer is None:
+        return set()
+    return {int(user_id) for user_id in buffer.hkeys(LAST_LOGIN_BUFFER_KEY)}
+
+
+def flush_last_logins(batch_size: int = 1000) -> int:
+    """
+    Save buffered dates of login to database. Buffer is read and cleared atomically,
+    if saving fails dates are returned to buffer without overwriting of newer logins
+
+    :param batch_size: count of users updated with one query
+    :return: count of updated users
+    """
+
+    buffer = get_buffer()
+    if buffer is None:
+        return 0
+
+    pipeline = buffer.pipeline(transaction=True)
+    pipeline.hgetall(LAST_LOGIN_BUFFER_KEY)
+    pipeline.delete(LAST_LOGIN_BUFFER_KEY)
+    last_logins, _ = pipeline.execute()
+    if not last_logins:
+        return 0
+
+    users = [
+        User(pk=int(user_id), last_login=datetime.fromisoformat(login_date.decode()))
+        for user_id, login_date in last_logins.items()
+    ]
+    try:
+        User.objects.bulk_update(users, ["last_login"], batch_size=batch_size)
+    except Exception:
+        pipeline = buffer.pipeline(transaction=True)
+        for user_id, login_date in last_logins.items():
+            pipeline.hsetnx(LAST_LOGIN_BUFFER_KEY, user_id, login_date)
+        pipeline.execute()
+        raise
+    return len(users)
@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.db import connection
+
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[bool]:
+    """
+    Postgres session advisory lock by name. Lock is common for all processes with one database
+    and is released after crash of process with its connection
+
+    :param name: name of lock
+    :return: True if lock is acquired, False if lock is held by other connection
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", [name])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [name])
@@ -0,0 +1,126 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+from django.core.mail import get_connection
+from django.db import transaction
+
+from courses.models import MailingChunk
+from users.models import OutboxEmail
+
+logger = logging.getLogger("celery_tasks")
+
+
+class TokenBucket:
+    """Rate limiter of sending: "rate" messages per second with bursts up to "capacity" messages"""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def acquire(self) -> None:
+        """Wait for token and take it"""
+
+        while True:
+            current = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (current - self.updated_at) * self.rate)
+            self.updated_at = current
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+def enqueue_emails(
+    emails: Iterable[tuple[str, str, str]],
+    batch_size: int = 500,
+    mailing_chunk: MailingChunk | None = None,
+    priority: int = OutboxEmail.PRIORITY_NORMAL,
+) -> int:
+    """
+    Save emails to outbox, sending is started after commit of transaction
+
+    :param emails: tuples of subject, body and recipient email
+    :param batch_size: count of emails in one insert
+    :param mailing_chunk: chunk of mailing of emails, progress of mailing is counted by status of its emails
+    :param priority: priority of sending, transactional emails have high priority over mailings
+    :return: count of saved emails
+    """
+
+    from users.tasks import send_outbox_emails
+
+    created = OutboxEmail.objects.bulk_create(
+        (
+            OutboxEmail(subject=subject, body=body, to=to, mailing_chunk=mailing_chunk, priority=priority)
+            for subject, body, to in emails
+        ),
+        batch_size=batch_size,
+    )
+    if created:
+        transaction.on_commit(send_outbox_emails.delay)
+    return len(created)
+
+
+def claim_due_emails(batch_size: int) -> list[OutboxEmail]:
+    """
+    Claim batch of pending emails with time of attempt in past in short transaction, emails with high priority first.
+    Rows of batch are locked only for update of status, so other workers skip them and don't wait for sending
+
+    :param batch_size: count of emails
+    :return: claimed emails
+    """
+
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["PENDING", "SENDING"], next_attempt_at__lte=datetime.now(timezone.utc))
+            .order_by("priority", "next_attempt_at")[:batch_size]
+        )
+        for email in emails:
+            email.mark_sending()
+        OutboxEmail.objects.bulk_update(emails, ["status", "next_attempt_at"])
+    return emails
+
+
+def send_due_emails(batch_size: int, rate_limiter: TokenBucket) -> tuple[int, int]:
+    """
+    Send batch of claimed emails with one SMTP connection outside of transaction and save results of sending
+
+    :param batch_size: count of emails
+    :param rate_limiter: rate limiter of sending
+    :return: count of sent emails and count of failed attempts
+    """
+
+    sent = failed = 0
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Email outbox - connection error: {e}")
+        for email in emails:
+            email.schedule_retry(e)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                rate_limiter.acquire()
+                try:
+                    connection.send_messages([email.get_message()])
+                    email.mark_sent()
+                    sent += 1
+                except Exception as e:
+                    logger.error(f"Email outbox - User: {email.to} - {e}")
+                    email.schedule_retry(e)
+                    failed += 1
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.bulk_update(emails, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+    return sent, failed
@@ -1,7 +1,17 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 from rest_framework import serializers
 
 from courses.models import Course, Lesson
-from users.models import User
+from users.models import Payment, Transfer, User
+from users.src.transfer_api_service import get_transfer_service
+
+logger = logging.getLogger("payment")
 
 
 class PaymentServices:
@@ -36,3 +46,138 @@ class PaymentServices:
             raise serializers.ValidationError("Неверный номер курса")
 
         return serializer.save(amount=amount, owner=owner), product_obj
+
+    @classmethod
+    def create_transfer(cls, payment: Payment, idempotency_key: str | None = None) -> Transfer | None:
+        """
+        Create checkout session in Stripe and Transfer object for payment with method "TRANSFER".
+        Requests to Stripe are sent outside of transaction, repeated requests with idempotency key return
+        same session, so payment is locked only for saving of transfer. Transfer isn't created again for payment
+        with transfer
+
+        :param payment: payment with paid course or lesson
+        :param idempotency_key: key of Stripe requests, by default key of payment
+        :return: transfer or None if payment has transfer
+        """
+
+        if payment.transfer_set.exists():
+            return None
+        product_obj = payment.paid_course or payment.paid_lesson
+        transfer_service = get_transfer_service()
+        transfer_data = transfer_service.create_transfer_and_return_data(
+            product=product_obj, amount=payment.amount, idempotency_key=idempotency_key or f"payment:{payment.pk}"
+        )
+        with transaction.atomic():
+            # Transfer of payment may be saved by redelivered task during requests to Stripe
+            if not Payment.objects.select_for_update().filter(pk=payment.pk).exists():
+                return None
+            if payment.transfer_set.exists():
+                return None
+            transfer = Transfer.objects.create(
+                payment=payment,
+                link=transfer_data.get("link"),
+                session_id=transfer_data.get("session_id"),
+                price_id=transfer_data.get("price_id"),
+                product_id=transfer_data.get("product_id"),
+            )
+        logger.info(f"Create transfer - Transfer: {product_obj.pk} {product_obj.name}")
+        return transfer
+
+    @classmethod
+    def mark_transfer_failed(cls, payment: Payment) -> bool:
+        """
+        Set status "FAILED" of payment without transfer after last attempt of its creation
+
+        :param payment: payment with method "TRANSFER"
+        :return: True if status is changed
+        """
+
+        updated = Payment.objects.filter(pk=payment.pk, payment_status="CREATED", transfer__isnull=True).update(
+            payment_status="FAILED"
+        )
+        if updated:
+            logger.error(f"Create transfer failed - Payment: {payment.pk}")
+        return bool(updated)
+
+    @classmethod
+    def update_status_by_event(cls, event: dict) -> int:
+        """
+        Mark payments of checkout session as paid by Stripe event "checkout.session.completed"
+        (or "checkout.session.async_payment_succeeded"). Repeated events don't change paid payments
+
+        :param event: verified Stripe event
+        :return: count of updated payments
+        """
+
+        if event["type"] not in ("checkout.session.completed", "checkout.session.async_payment_succeeded"):
+            return 0
+        session = event["data"]["object"]
+        if session["payment_status"] != "paid":
+            return 0
+        return Payment.objects.filter(transfer__session_id=session["id"], payment_status="CREATED").update(
+            payment_status="PAID", payment_date=timezone.now()
+        )
+
+    @classmethod
+    def reconcile_pending_payments(
+        cls, created_after: datetime, batch_size: int, concurrency: int
+    ) -> tuple[int, int, int]:
+        """
+        Check pending transfer payments in Stripe and mark paid payments, for payments missed by webhook.
+        Payments are read by batches ordered by date of creation with partial index of pending transfers,
+        sessions of batch are retrieved by "concurrency" threads and paid payments of batch are updated with one query.
+        Payments without transfer are skipped, transfer of them is not created yet
+
+        :param created_after: only payments created after this date are checked (sessions expire in Stripe)
+        :param batch_size: count of payments in batch
+        :param concurrency: count of concurrent requests to Stripe
+        :return: count of checked and paid payments and count of errors of Stripe
+        """
+
+        transfer_service = get_transfer_service()
+        pending_payments = (
+            Payment.objects.filter(
+                payment_status="CREATED", payment_method="TRANSFER", created_date__gte=created_after
+            )
+            .order_by("created_date", "id")
+            .only("id", "created_date")
+            .prefetch_related(Prefetch("transfer_set", queryset=Transfer.objects.only("payment_id", "session_id")))
+        )
+
+        def is_paid(session_id: str) -> bool | None:
+            """Status of session, None for error of Stripe"""
+
+            try:
+                return transfer_service.retrieve_session(session_id)["payment_status"] == "paid"
+            except Exception as e:
+                logger.warning(f"Reconciliation error: {e} - Session: {session_id}")
+                return None
+
+        checked = paid = errors = 0
+        batch_payments = pending_payments
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                batch = list(batch_payments[:batch_size])
+                if not batch:
+                    break
+                last = batch[-1]
+                batch_payments = pending_payments.filter(
+                    Q(created_date__gte=last.created_date)
+                    & (Q(created_date__gt=last.created_date) | Q(created_date=last.created_date, id__gt=last.id))
+                )
+
+                sessions = [
+                    (payment.id, transfer.session_id)
+                    for payment in batch
+                    for transfer in payment.transfer_set.all()
+                    if transfer.session_id
+                ]
+                results = list(executor.map(is_paid, [session_id for _, session_id in sessions]))
+                paid_ids = {payment_id for (payment_id, _), result in zip(sessions, results) if result}
+                if paid_ids:
+                    paid += Payment.objects.filter(id__in=paid_ids, payment_status="CREATED").update(
+                        payment_status="PAID", payment_date=timezone.now()
+                    )
+                errors += sum(result is None for result in results)
+                checked += sum(result is not None for result in results)
+        return checked, paid, errors
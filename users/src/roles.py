@@ -0,0 +1,40 @@
+"""
+Role of moderator of user. Role is resolved once per request and saved in attribute "is_moderator" of user.
+With Redis cache (settings.CACHE_ENABLED) role is cached for ROLE_CACHE_TIMEOUT seconds,
+cached role is deleted by signals on changes of groups of user
+"""
+
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+
+from users.models import User
+
+MODERATORS_GROUP_NAME = "Модераторы"
+MODERATOR_ROLE_KEY = "users:{pk}:is_moderator"
+
+
+def get_moderator_role(user_pk: int) -> bool:
+    if not settings.CACHE_ENABLED:
+        return User.groups.through.objects.filter(user_id=user_pk, group__name=MODERATORS_GROUP_NAME).exists()
+
+    key = MODERATOR_ROLE_KEY.format(pk=user_pk)
+    role = cache.get(key)
+    if role is None:
+        role = User.groups.through.objects.filter(user_id=user_pk, group__name=MODERATORS_GROUP_NAME).exists()
+        cache.set(key, role, settings.ROLE_CACHE_TIMEOUT)
+    return role
+
+
+def is_moderator(user: User | AnonymousUser) -> bool:
+    if not user.is_authenticated:
+        return False
+    if not hasattr(user, "is_moderator"):
+        user.is_moderator = get_moderator_role(user.pk)
+    return user.is_moderator
+
+
+def invalidate_moderator_role(user_pks: Iterable[int]) -> None:
+    cache.delete_many([MODERATOR_ROLE_KEY.format(pk=user_pk) for user_pk in user_pks])
@@ -0,0 +1,47 @@
+"""
+Claims of user in JWT for authentication without query of user.
+Claims of user are marked stale in cache after deactivation, deletion or change of role of user,
+tokens issued before it are authenticated with query of user
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from users.models import User
+
+CLAIMS_STALE_KEY = "users:{pk}:claims_stale_at"
+# Time of login, copied from refresh token to access tokens
+AUTH_TIME_CLAIM = "auth_time"
+USER_CLAIMS = ("email", "is_active", "is_moderator")
+
+
+def mark_claims_stale(user_pks: list[int] | set[int]) -> None:
+    """Mark claims of users stale until all tokens issued before it are expired"""
+
+    stale_at = time.time()
+    timeout = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+    cache.set_many({CLAIMS_STALE_KEY.format(pk=user_pk): stale_at for user_pk in user_pks}, timeout)
+
+
+def is_claims_stale(user_pk: int, auth_time: float) -> bool:
+    stale_at = cache.get(CLAIMS_STALE_KEY.format(pk=user_pk))
+    return stale_at is not None and auth_time <= stale_at
+
+
+def get_user_from_claims(user_pk: int, claims: dict) -> User:
+    """
+    User built from claims of token without query. Other fields of user are deferred,
+    they are loaded with one query on first access
+
+    :param user_pk: id of user
+    :param claims: claims of token with keys from USER_CLAIMS
+    :return: user
+    """
+
+    loaded = {"id": User._meta.pk.to_python(user_pk), "email": claims["email"], "is_active": claims["is_active"]}
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in loaded]
+    user = User.from_db("default", fields, [loaded[field] for field in fields])
+    user.is_moderator = claims["is_moderator"]
+    return user
@@ -1,9 +1,32 @@
+import logging
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
 
+import requests
 import stripe
+from django.core.cache import cache
 from django.db import models
+from django.db.models import F, Func, JSONField, Value
+from django.utils.module_loading import import_string
 
-from config.settings import BASE_URL
+from config.settings import (BASE_URL, STRIPE_API_BASE, STRIPE_API_KEY, STRIPE_CONNECT_TIMEOUT, STRIPE_MAX_RETRIES,
+                             STRIPE_PRICE_CACHE_TIMEOUT, STRIPE_READ_TIMEOUT, TRANSFER_API_SERVICE)
+
+logger = logging.getLogger("payment")
+
+STRIPE_CURRENCY = "rub"
+PRICE_CACHE_KEY = "stripe:price:{product_id}:{price_key}"
+
+
+class JSONMerge(Func):
+    """Merge of jsonb objects by Postgres operator "||", keys of right object replace keys of left object"""
+
+    arg_joiner = " || "
+    template = "(%(expressions)s)"
+    output_field = JSONField()
 
 
 class TransferAPIService(ABC):
@@ -22,6 +45,46 @@ class TransferAPIService(ABC):
         pass
 
 
+@lru_cache(maxsize=None)
+def get_stripe_client(api_key: str) -> stripe.StripeClient:
+    """
+    Stripe client of process for api key. Client keeps HTTP connections in pool of requests session,
+    requests have connect and read timeouts, failed requests are retried with exponential backoff and jitter
+    """
+
+    http_client = stripe.RequestsClient(
+        timeout=(STRIPE_CONNECT_TIMEOUT, STRIPE_READ_TIMEOUT), session=requests.Session()
+    )
+    return stripe.StripeClient(
+        api_key,
+        http_client=http_client,
+        max_network_retries=STRIPE_MAX_RETRIES,
+        base_addresses={"api": STRIPE_API_BASE} if STRIPE_API_BASE else None,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_local_registry(api_base: str) -> dict:
+    """Registry of product and price ids of stand-in of Stripe at address "api_base" in memory of process"""
+
+    return {}
+
+
+@contextmanager
+def measure_latency(operation: str) -> Iterator[None]:
+    """Log latency of Stripe call with result of call"""
+
+    start_time = time.monotonic()
+    result = "ok"
+    try:
+        yield
+    except Exception:
+        result = "error"
+        raise
+    finally:
+        logger.info(f"Stripe call: {operation} - {result} - {(time.monotonic() - start_time) * 1000:.0f} ms")
+
+
 class StripeAPIService(TransferAPIService):
     """API service for work with stripe service"""
 
@@ -30,55 +93,136 @@ class StripeAPIService(TransferAPIService):
     def __init__(self, api_key: str) -> None:
         self.api_key = api_key
 
-    def create_transfer_and_return_data(self, product: models, amount: float) -> dict:
+    @property
+    def client(self) -> stripe.StripeClient:
+        return get_stripe_client(self.api_key)
+
+    def create_transfer_and_return_data(
+        self, product: models, amount: float, idempotency_key: str | None = None
+    ) -> dict:
         """
         Create transfer and return data
 
         :param product: Lesson or Course object
         :param amount: amount from Payment object
+        :param idempotency_key: key of Stripe requests, repeated requests with key don't create objects again
         :return: dict with params of transfer
         """
 
-        stripe.api_key = self.api_key
+        product_id = self.get_product_id(product, idempotency_key=idempotency_key)
+        price_id = self.get_price_id(product, product_id, int(amount * 100), idempotency_key=idempotency_key)
+        session = self.create_session(price_id, idempotency_key=idempotency_key)
+
+        return {"product_id": product_id, "price_id": price_id, "session_id": session["id"], "link": session["url"]}
+
+    @property
+    def local_registry(self) -> dict | None:
+        """
+        Registry of product and price ids in memory of process for stand-in of Stripe at settings.STRIPE_API_BASE.
+        Ids of stand-in are not saved to products and cache, so they don't replace ids of real Stripe.
+        None for real Stripe, then ids are saved to products
+        """
+
+        return get_local_registry(STRIPE_API_BASE) if STRIPE_API_BASE else None
+
+    def get_product_id(self, product: models.Model, idempotency_key: str | None = None) -> str:
+        """
+        Get product_id of Stripe product of product, new product is created in Stripe only if it isn't found
+
+        :param product: Lesson or Course object
+        :param idempotency_key: key of Stripe request of product creation
+        :return: product_id
+        """
+
+        registry = self.local_registry
+        if registry is not None:
+            registry_key = ("product", product._meta.label, product.pk)
+            if registry_key not in registry:
+                registry[registry_key] = self.create_product(product.name, idempotency_key=idempotency_key)["id"]
+            return registry[registry_key]
 
-        if product.stripe_product_id:
-            product_id = product.stripe_product_id
-        else:
-            product_id = self.create_product(product.name).get("id")
+        if not product.stripe_product_id:
+            product_id = self.create_product(product.name, idempotency_key=idempotency_key)["id"]
+            # Product_id is saved without save of product, so date of update of product isn't changed
             product.stripe_product_id = product_id
-            product.save()
-
-        price_id = stripe.Price.create(currency="rub", unit_amount=int(amount * 100), product=product_id).get("id")
-        session_dict = stripe.checkout.Session.create(
-            success_url=BASE_URL,
-            line_items=[{"price": price_id, "quantity": 1}],
-            mode="payment",
-        )
-        session_id = session_dict.get("id")
-        link = session_dict.get("url")
-
-        return {"product_id": product_id, "price_id": price_id, "session_id": session_id, "link": link}
-
-    def retrieve_session(self, session_id: str) -> dict:
-        stripe.api_key = self.api_key
-        return stripe.checkout.Session.retrieve(session_id)
-
-    def create_product(self, product_name: str) -> dict:
-        client = stripe.StripeClient(self.api_key)
-        return client.v1.products.create({"name": product_name})
-
-    def create_price(self, product: str, amount: int) -> dict:
-        stripe.api_key = self.api_key
-        return stripe.Price.create(
-            currency="rub",
-            unit_amount=amount,
-            product=product,
-        )
-
-    def create_session(self, price: str) -> dict:
-        stripe.api_key = self.api_key
-        return stripe.checkout.Session.create(
-            success_url=BASE_URL,
-            line_items=[{"price": price, "quantity": 1}],
-            mode="payment",
-        )
+            type(product).objects.filter(pk=product.pk).update(stripe_product_id=product_id)
+        return product.stripe_product_id
+
+    def get_price_id(
+        self, product: models.Model, product_id: str, amount: int, idempotency_key: str | None = None
+    ) -> str:
+        """
+        Get price_id of Stripe price of product for amount. Price is searched in cache, then in registry
+        of prices in field "stripe_prices" of product (in local registry for stand-in of Stripe),
+        new price is created in Stripe only if it isn't found
+
+        :param product: Lesson or Course object
+        :param product_id: Stripe product_id of product
+        :param amount: amount in minimal units of currency
+        :param idempotency_key: key of Stripe request of price creation
+        :return: price_id
+        """
+
+        price_key = f"{STRIPE_CURRENCY}:{amount}"
+        registry = self.local_registry
+        if registry is not None:
+            registry_key = ("price", product_id, price_key)
+            if registry_key not in registry:
+                registry[registry_key] = self.create_price(product_id, amount, idempotency_key=idempotency_key)["id"]
+            return registry[registry_key]
+
+        cache_key = PRICE_CACHE_KEY.format(product_id=product_id, price_key=price_key)
+        price_id = cache.get(cache_key)
+        if price_id is not None:
+            return price_id
+
+        price_id = product.stripe_prices.get(price_key)
+        if price_id is None:
+            price_id = self.create_price(product_id, amount, idempotency_key=idempotency_key)["id"]
+            # Price is merged to registry in database with one UPDATE, so prices saved by concurrent tasks
+            # are not overwritten and date of update of product isn't changed
+            product.stripe_prices = {**product.stripe_prices, price_key: price_id}
+            type(product).objects.filter(pk=product.pk).update(
+                stripe_prices=JSONMerge(F("stripe_prices"), Value({price_key: price_id}, output_field=JSONField()))
+            )
+
+        cache.set(cache_key, price_id, STRIPE_PRICE_CACHE_TIMEOUT)
+        return price_id
+
+    def retrieve_session(self, session_id: str) -> stripe.checkout.Session:
+        with measure_latency("retrieve_session"):
+            return self.client.v1.checkout.sessions.retrieve(session_id)
+
+    @staticmethod
+    def get_request_options(idempotency_key: str | None, operation: str) -> dict:
+        """Options of Stripe request with idempotency key, key is unique for each operation"""
+
+        if idempotency_key is None:
+            return {}
+        return {"idempotency_key": f"{idempotency_key}:{operation}"}
+
+    def create_product(self, product_name: str, idempotency_key: str | None = None) -> stripe.Product:
+        with measure_latency("create_product"):
+            return self.client.v1.products.create(
+                {"name": product_name}, self.get_request_options(idempotency_key, "product")
+            )
+
+    def create_price(self, product: str, amount: int, idempotency_key: str | None = None) -> stripe.Price:
+        with measure_latency("create_price"):
+            return self.client.v1.prices.create(
+                {"currency": STRIPE_CURRENCY, "unit_amount": amount, "product": product},
+                self.get_request_options(idempotency_key, "price"),
+            )
+
+    def create_session(self, price: str, idempotency_key: str | None = None) -> stripe.checkout.Session:
+        with measure_latency("create_session"):
+            return self.client.v1.checkout.sessions.create(
+                {"success_url": BASE_URL, "line_items": [{"price": price, "quantity": 1}], "mode": "payment"},
+                self.get_request_options(idempotency_key, "session"),
+            )
+
+
+def get_transfer_service() -> StripeAPIService:
+    """API service of transfers selected by settings.TRANSFER_API_SERVICE"""
+
+    return import_string(TRANSFER_API_SERVICE)(STRIPE_API_KEY)
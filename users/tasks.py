@@ -1,9 +1,19 @@
 import logging
+import time
 
 from celery import shared_task
+from django.db.models import Max, Min
 from django.utils import timezone
 
-from users.models import User
+from config.settings import (BAN_CHUNK_SIZE, EMAIL_OUTBOX_BATCH_SIZE, EMAIL_OUTBOX_DRAIN_TIME, EMAIL_RATE_BURST,
+                             EMAIL_RATE_LIMIT, IDEMPOTENCY_KEY_TIMEOUT, INACTIVE_USER_DAYS,
+                             PAYMENT_RECONCILE_BATCH_SIZE, PAYMENT_RECONCILE_CONCURRENCY, PAYMENT_RECONCILE_PERIOD)
+from users.models import IdempotencyKey, Payment, User
+from users.src.last_login import flush_last_logins as flush_last_logins_buffer
+from users.src.last_login import get_buffered_user_ids
+from users.src.locks import advisory_lock
+from users.src.outbox import TokenBucket, send_due_emails
+from users.src.payment import PaymentServices
 
 
 logger = logging.getLogger("celery_tasks")
@@ -11,8 +21,111 @@ logger = logging.getLogger("celery_tasks")
 
 @shared_task
 def ban_inactive_users() -> None:
-    users = User.objects.filter(is_active=True, last_login__lt=timezone.now() - timezone.timedelta(days=31))
-    logger.info(f"{len(users)} users banned")
-    for user in users:
-        user.is_active = False
-        user.save()
+    """
+    Task for ban of users without login for INACTIVE_USER_DAYS days.
+    Users are updated without loading by UPDATE queries on ranges of ids, so each query locks limited count of rows.
+    Buffered dates of login are saved before ban, users logged in after saving are not banned.
+    Claims of banned users in tokens are not marked stale: tokens are issued on login and expire
+    long before INACTIVE_USER_DAYS days, so banned users have no valid tokens
+    """
+
+    start_time = time.monotonic()
+    flush_last_logins_buffer()
+    inactive_users = User.objects.filter(
+        is_active=True, last_login__lt=timezone.now() - timezone.timedelta(days=INACTIVE_USER_DAYS)
+    ).exclude(id__in=get_buffered_user_ids())
+    id_range = inactive_users.aggregate(first_id=Min("id"), last_id=Max("id"))
+    banned = 0
+    if id_range["first_id"] is not None:
+        for first_id in range(id_range["first_id"], id_range["last_id"] + 1, BAN_CHUNK_SIZE):
+            banned += inactive_users.filter(id__gte=first_id, id__lt=first_id + BAN_CHUNK_SIZE).update(
+                is_active=False
+            )
+    logger.info(f"{banned} users banned in {time.monotonic() - start_time:.2f} s")
+
+
+@shared_task
+def send_outbox_emails() -> None:
+    """
+    Task for sending of emails from outbox by batches with rate limit.
+    Only one task sends emails at a time by advisory lock in database, so rate limit is common for all workers
+    """
+
+    with advisory_lock("email_outbox") as acquired:
+        if not acquired:
+            return
+        rate_limiter = TokenBucket(EMAIL_RATE_LIMIT, EMAIL_RATE_BURST)
+        deadline = time.monotonic() + EMAIL_OUTBOX_DRAIN_TIME
+        total_sent = total_failed = 0
+        while time.monotonic() < deadline:
+            sent, failed = send_due_emails(EMAIL_OUTBOX_BATCH_SIZE, rate_limiter)
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+        if total_sent or total_failed:
+            logger.info(f"Email outbox - sent: {total_sent}, failed attempts: {total_failed}")
+
+
+@shared_task
+def delete_expired_idempotency_keys() -> None:
+    """Task for deletion of idempotency keys older than IDEMPOTENCY_KEY_TIMEOUT seconds"""
+
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - timezone.timedelta(seconds=IDEMPOTENCY_KEY_TIMEOUT)
+    ).delete()
+    if deleted:
+        logger.info(f"{deleted} expired idempotency keys deleted")
+
+
+@shared_task
+def flush_last_logins() -> None:
+    """Task for saving of buffered dates of last login to database"""
+
+    updated = flush_last_logins_buffer()
+    if updated:
+        logger.info(f"Last login of {updated} users saved")
+
+
+@shared_task
+def reconcile_payments() -> None:
+    """
+    Task for reconciliation of pending transfer payments with Stripe,
+    only one task runs at a time by advisory lock in database
+    """
+
+    with advisory_lock("payment_reconciliation") as acquired:
+        if not acquired:
+            return
+        start_time = time.monotonic()
+        checked, paid, errors = PaymentServices.reconcile_pending_payments(
+            created_after=timezone.now() - PAYMENT_RECONCILE_PERIOD,
+            batch_size=PAYMENT_RECONCILE_BATCH_SIZE,
+            concurrency=PAYMENT_RECONCILE_CONCURRENCY,
+        )
+        logger.info(
+            f"Payment reconciliation - checked: {checked}, paid: {paid}, errors: {errors} "
+            f"in {time.monotonic() - start_time:.2f} s"
+        )
+
+
+@shared_task(
+    bind=True, acks_late=True, autoretry_for=(Exception,), max_retries=3, retry_backoff=True, retry_jitter=True
+)
+def create_transfer(self, payment_pk: int, idempotency_key: str | None = None) -> None:
+    """
+    Task for creating of transfer of payment in Stripe. Failed task is retried with backoff,
+    task is acknowledged after finish, so it is delivered again after crash.
+    Payment gets status "FAILED" after last retry
+    """
+
+    payment = Payment.objects.select_related("paid_course", "paid_lesson").filter(pk=payment_pk).first()
+    if payment is None:
+        return
+    try:
+        PaymentServices.create_transfer(payment, idempotency_key=idempotency_key)
+    except Exception as e:
+        logger.error(f"Create transfer error: {e} - Payment: {payment_pk} - attempt: {self.request.retries + 1}")
+        if self.request.retries >= self.max_retries:
+            PaymentServices.mark_transfer_failed(payment)
+        raise
@@ -0,0 +1,59 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from users.authentication import StatelessJWTAuthentication
+from users.models import User
+from users.serializers import UserTokenObtainPairSerializer
+from users.src.roles import MODERATORS_GROUP_NAME, is_moderator
+
+
+@override_settings(CACHE_ENABLED=True)
+class StatelessJWTAuthenticationTest(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(email="test_user@test.com", first_name="Test", is_active=True)
+        self.token = str(UserTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def authenticate(self) -> User:
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        return user
+
+    def test_user_from_claims(self) -> None:
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.email, self.user.email)
+            self.assertFalse(is_moderator(user))
+
+        # Other fields are loaded on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, "Test")
+            self.assertEqual(user.phone, self.user.phone)
+
+    def test_deactivated_user(self) -> None:
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_user(self) -> None:
+        self.user.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_changed_role(self) -> None:
+        group, _ = Group.objects.get_or_create(name=MODERATORS_GROUP_NAME)
+        self.user.groups.add(group)
+
+        # Stale claims, user is loaded from database
+        user = self.authenticate()
+        self.assertEqual(user.get_deferred_fields(), set())
+        self.assertTrue(is_moderator(user))
@@ -0,0 +1,85 @@
+import threading
+import urllib.request
+from unittest.mock import patch
+
+import stripe
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from courses.models import Course
+from users.models import User
+from users.src import transfer_api_service
+from users.src.fake_stripe import FakeStripe, FakeStripeAPIService, get_fake_stripe, make_fake_stripe_server
+from users.src.transfer_api_service import (StripeAPIService, get_local_registry, get_stripe_client,
+                                            get_transfer_service)
+
+
+class FakeStripeTest(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+        self.course = Course.objects.create(name="Test Course", description="", preview="", owner=self.user, price=100)
+
+    @patch.object(transfer_api_service, "TRANSFER_API_SERVICE", "users.src.fake_stripe.FakeStripeAPIService")
+    def test_in_process_service(self) -> None:
+        service = get_transfer_service()
+        self.assertIsInstance(service, FakeStripeAPIService)
+
+        transfer_data = service.create_transfer_and_return_data(self.course, 100.0, idempotency_key="payment:1")
+        self.assertTrue(transfer_data["product_id"].startswith("prod_fake_"))
+        self.assertEqual(service.retrieve_session(transfer_data["session_id"])["payment_status"], "unpaid")
+
+        # Repeated request with idempotency key returns same session
+        session = service.create_session(transfer_data["price_id"], idempotency_key="payment:1")
+        self.assertEqual(session["id"], transfer_data["session_id"])
+
+        get_fake_stripe().pay_session(transfer_data["session_id"])
+        self.assertEqual(service.retrieve_session(transfer_data["session_id"])["payment_status"], "paid")
+
+    def assert_ids_not_saved(self, service: StripeAPIService) -> None:
+        """Ids of stand-in are kept in memory and are not saved to product and cache"""
+
+        transfer_data = service.create_transfer_and_return_data(self.course, 100.0)
+        self.course.refresh_from_db()
+        self.assertIsNone(self.course.stripe_product_id)
+        self.assertEqual(self.course.stripe_prices, {})
+        self.assertIsNone(cache.get(f"stripe:price:{transfer_data['product_id']}:rub:10000"))
+
+        # Product and price are created once in stand-in
+        other_transfer_data = service.create_transfer_and_return_data(self.course, 100.0)
+        self.assertEqual(other_transfer_data["product_id"], transfer_data["product_id"])
+        self.assertEqual(other_transfer_data["price_id"], transfer_data["price_id"])
+
+    def test_in_process_service_ids_not_saved(self) -> None:
+        with patch("users.src.fake_stripe.get_fake_stripe", return_value=FakeStripe()):
+            self.assert_ids_not_saved(FakeStripeAPIService("sk_test"))
+
+    def test_failure_injection(self) -> None:
+        with patch("users.src.fake_stripe.get_fake_stripe", return_value=FakeStripe(failure_rate=1)):
+            with self.assertRaises(stripe.APIConnectionError):
+                FakeStripeAPIService("sk_test").create_product("Test Course")
+
+    def test_http_server(self) -> None:
+        server = make_fake_stripe_server("127.0.0.1", 0, FakeStripe())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        patcher = patch.object(transfer_api_service, "STRIPE_API_BASE", f"http://127.0.0.1:{server.server_port}")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_stripe_client.cache_clear()
+        self.addCleanup(get_stripe_client.cache_clear)
+
+        service = StripeAPIService("sk_test")
+        transfer_data = service.create_transfer_and_return_data(self.course, 100.0)
+        self.assertEqual(service.retrieve_session(transfer_data["session_id"])["payment_status"], "unpaid")
+
+        # Opening of checkout page pays session
+        urllib.request.urlopen(transfer_data["link"]).read()
+        self.assertEqual(service.retrieve_session(transfer_data["session_id"])["payment_status"], "paid")
+
+        get_local_registry.cache_clear()
+        self.addCleanup(get_local_registry.cache_clear)
+        self.assert_ids_not_saved(service)
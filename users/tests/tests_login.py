@@ -0,0 +1,38 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from users.models import User
+from users.views import LoginView
+
+
+class LoginTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+        self.user.set_password("test_PASSWORD")
+        self.user.save()
+
+    def login(self, password: str):
+        request = self.factory.post(
+            reverse("users:login"), data={"email": self.user.email, "password": password}, format="json"
+        )
+        return LoginView.as_view()(request)
+
+    def test_login(self) -> None:
+        # Query of user for authentication, role of user for claims of token and update of last login
+        with self.assertNumQueries(3):
+            response = self.login("test_PASSWORD")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_login_wrong_password(self) -> None:
+        response = self.login("wrong_PASSWORD")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connections
+from django.test import TestCase
+
+from users.models import OutboxEmail
+from users.src.outbox import TokenBucket, claim_due_emails, enqueue_emails
+from users.tasks import send_outbox_emails
+
+
+class OutboxTest(TestCase):
+
+    def setUp(self) -> None:
+        enqueue_emails([("Subject", "Body", "user_1@test.com"), ("Subject", "Body", "user_2@test.com")])
+
+    def test_send_outbox_emails(self) -> None:
+
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(OutboxEmail.objects.filter(status="SENT").count(), 2)
+
+        # Sent emails are not sent again
+        send_outbox_emails()
+        self.assertEqual(len(mail.outbox), 2)
+
+    @patch.object(EmailBackend, "send_messages", side_effect=ConnectionError("SMTP error"))
+    def test_send_outbox_emails_retry(self, mock_send_messages: Mock) -> None:
+
+        send_outbox_emails()
+
+        email = OutboxEmail.objects.first()
+        self.assertEqual(email.status, "PENDING")
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, "SMTP error")
+        self.assertGreater(email.next_attempt_at, datetime.now(timezone.utc))
+
+        # Email is not sent before time of next attempt
+        mock_send_messages.reset_mock()
+        send_outbox_emails()
+        mock_send_messages.assert_not_called()
+
+    def test_send_outbox_emails_claimed(self) -> None:
+
+        # Email claimed by other worker is skipped until end of claim
+        first_email, second_email = OutboxEmail.objects.order_by("id")
+        first_email.mark_sending()
+        first_email.save()
+        send_outbox_emails()
+
+        self.assertEqual([message.to[0] for message in mail.outbox], ["user_2@test.com"])
+
+        # Email of crashed worker is sent after end of claim
+        OutboxEmail.objects.filter(pk=first_email.pk).update(next_attempt_at=datetime.now(timezone.utc))
+        send_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(OutboxEmail.objects.filter(status="SENT").count(), 2)
+
+    def test_send_outbox_emails_locked(self) -> None:
+
+        # Other worker holds lock of outbox with its connection
+        other_connection = connections.create_connection("default")
+        self.addCleanup(other_connection.close)
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", ["email_outbox"])
+
+        send_outbox_emails()
+        self.assertEqual(len(mail.outbox), 0)
+
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", ["email_outbox"])
+        send_outbox_emails()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_send_outbox_emails_priority(self) -> None:
+
+        # Verification email saved after mailing is sent in first batch
+        enqueue_emails([("Verification", "Body", "user_3@test.com")], priority=OutboxEmail.PRIORITY_HIGH)
+        claimed = claim_due_emails(batch_size=1)
+
+        self.assertEqual([email.to for email in claimed], ["user_3@test.com"])
+
+    @patch("users.models.EMAIL_MAX_ATTEMPTS", 1)
+    @patch.object(EmailBackend, "send_messages", side_effect=ConnectionError("SMTP error"))
+    def test_send_outbox_emails_failed(self, mock_send_messages: Mock) -> None:
+
+        send_outbox_emails()
+
+        self.assertEqual(OutboxEmail.objects.filter(status="FAILED").count(), 2)
+
+    @patch("users.src.outbox.time.sleep")
+    def test_token_bucket(self, mock_sleep: Mock) -> None:
+
+        rate_limiter = TokenBucket(rate=1, capacity=2)
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+        mock_sleep.assert_not_called()
+
+        # Third token is waited
+        updated_at = rate_limiter.updated_at
+        with patch("users.src.outbox.time.monotonic", side_effect=[updated_at, updated_at + 1]):
+            rate_limiter.acquire()
+        mock_sleep.assert_called_once()
@@ -1,17 +1,34 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
 from unittest.mock import Mock, patch
 
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
 from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 
+from config.celery import app
 from courses.models import Course
-from users.models import User
+from users.models import IdempotencyKey, Payment, Transfer, User
+from users.paginators import PaymentListKeysetPaginator
+from users.src.roles import MODERATORS_GROUP_NAME
 from users.src.transfer_api_service import StripeAPIService
-from users.views import PaymentCreateAPIView
+from users.tasks import create_transfer
+from users.views import (PaymentCreateAPIView, PaymentListAPIView, PaymentRetrieveAPIView, StripeWebhookAPIView,
+                         UserPaymentListAPIView, UserRetrieveAPIView)
 
 
 class PaymentTest(APITestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.factory = APIRequestFactory()
         self.user = User.objects.create(email="test_user@test.com", password="test_PASSWORD", is_active=True)
         self.course = Course.objects.create(
@@ -93,10 +110,263 @@ class PaymentTest(APITestCase):
         )
 
         force_authenticate(request, user=self.user)
-        response = view(request)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = view(request)
+
+        # Transfer is created by task after response
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNone(response.data["transfer"])
+        moch_create_stripe.assert_not_called()
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+        for callback in callbacks:
+            callback()
+
+        request = self.factory.get(reverse("users:payment-detail", kwargs={"pk": response.data["id"]}))
+        force_authenticate(request, user=self.user)
+        response = PaymentRetrieveAPIView.as_view()(request, pk=response.data["id"])
 
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data["transfer"]["link"], moch_data_dict["link"])
         self.assertEqual(response.data["transfer"]["session_id"], moch_data_dict["session_id"])
         self.assertEqual(response.data["transfer"]["price_id"], moch_data_dict["price_id"])
         self.assertEqual(response.data["transfer"]["product_id"], moch_data_dict["product_id"])
+
+    @patch.object(create_transfer, "delay")
+    def test_create_payment_idempotency_key(self, mock_delay: Mock) -> None:
+        view = PaymentCreateAPIView.as_view()
+
+        def create_payment(user: User, key: str, payment_method: str = "TRANSFER"):
+            request = self.factory.post(
+                reverse("users:payment-create"),
+                data={"paid_course": self.course.id, "paid_lesson": "", "payment_method": payment_method},
+                format="json",
+                HTTP_IDEMPOTENCY_KEY=key,
+            )
+            force_authenticate(request, user=user)
+            with self.captureOnCommitCallbacks(execute=True):
+                return view(request)
+
+        response = create_payment(self.user, "key_1")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        # Repeated request gets first response without new payment and transfer,
+        # with deletion of expired key and query of saved key
+        with self.assertNumQueries(2):
+            repeated_response = create_payment(self.user, "key_1")
+        self.assertEqual(repeated_response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(repeated_response.data["id"], response.data["id"])
+        self.assertEqual(Payment.objects.count(), 1)
+        mock_delay.assert_called_once()
+
+        # Key is passed to Stripe task with user
+        payment_pk, idempotency_key = mock_delay.call_args.args
+        self.assertEqual(payment_pk, response.data["id"])
+        self.assertTrue(idempotency_key.startswith(f"user:{self.user.pk}:"))
+
+        # Request with used key and other data is rejected
+        response_with_other_data = create_payment(self.user, "key_1", payment_method="CASH")
+        self.assertEqual(response_with_other_data.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Payment.objects.count(), 1)
+
+        # Request with key in progress
+        IdempotencyKey.objects.filter(response_status__isnull=False).update(response_status=None)
+        self.assertEqual(create_payment(self.user, "key_1").status_code, status.HTTP_409_CONFLICT)
+
+        # Same key of other user and other key of user create new payments
+        other_user = User.objects.create(email="other_user@test.com", is_active=True)
+        self.assertNotEqual(create_payment(other_user, "key_1").data["id"], response.data["id"])
+        self.assertNotEqual(create_payment(self.user, "key_2").data["id"], response.data["id"])
+        self.assertEqual(Payment.objects.count(), 3)
+
+    def test_user_payment_history(self) -> None:
+        payments = [
+            Payment.objects.create(owner=self.user, paid_course=self.course, amount=1000, payment_method="TRANSFER")
+            for _ in range(3)
+        ]
+        for payment in payments:
+            Transfer.objects.create(
+                payment=payment, link="https://stripe.com/pay", session_id="sess", price_id="price", product_id="prod"
+            )
+
+        view = UserPaymentListAPIView.as_view()
+        path = reverse("users:user-payments", kwargs={"pk": self.user.pk})
+        request = self.factory.get(path, {"page_size": 2})
+        force_authenticate(request, user=self.user)
+
+        # Role of user, page of payments and prefetch of transfers
+        with self.assertNumQueries(3):
+            response = view(request, pk=self.user.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([payment["id"] for payment in response.data["results"]], [payments[2].pk, payments[1].pk])
+        self.assertEqual(response.data["results"][0]["transfer"]["link"], "https://stripe.com/pay")
+
+        request = self.factory.get(response.data["next"])
+        force_authenticate(request, user=self.user)
+        response = view(request, pk=self.user.pk)
+        self.assertEqual([payment["id"] for payment in response.data["results"]], [payments[0].pk])
+        self.assertIsNone(response.data["next"])
+
+        # Payment history of other user
+        other_user = User.objects.create(email="other_user@test.com", is_active=True)
+        request = self.factory.get(path)
+        force_authenticate(request, user=other_user)
+        self.assertEqual(view(request, pk=self.user.pk).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_user_retrieve(self) -> None:
+        view = UserRetrieveAPIView.as_view()
+        path = reverse("users:user-get", kwargs={"pk": self.user.pk})
+        request = self.factory.get(path)
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(1):
+            response = view(request, pk=self.user.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["payment_history"].endswith(f"/users/{self.user.pk}/payments/"))
+
+
+@patch("users.views.STRIPE_WEBHOOK_SECRET", "whsec_test")
+class StripeWebhookTest(APITestCase):
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(email="test_user@test.com", password="test_PASSWORD", is_active=True)
+        self.course = Course.objects.create(
+            name="test_course", preview="", video_url="", owner=self.user, description="", price=1000
+        )
+        self.payment = Payment.objects.create(
+            owner=self.user, paid_course=self.course, amount=1000, payment_method="TRANSFER"
+        )
+        Transfer.objects.create(
+            payment=self.payment,
+            link="https://stripe.com/pay",
+            session_id="cs_test",
+            price_id="price",
+            product_id="prod",
+        )
+
+    def post_event(self, event: dict, secret: str = "whsec_test"):
+        """Post event signed like Stripe: HMAC SHA256 of "timestamp.payload" in header Stripe-Signature"""
+
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        request = self.factory.post(
+            reverse("users:payment-webhook"),
+            data=payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={signature}",
+        )
+        return StripeWebhookAPIView.as_view()(request)
+
+    def get_event(self, event_type: str = "checkout.session.completed") -> dict:
+        return {
+            "id": "evt_test",
+            "object": "event",
+            "type": event_type,
+            "data": {"object": {"id": "cs_test", "object": "checkout.session", "payment_status": "paid"}},
+        }
+
+    def test_checkout_completed(self) -> None:
+        response = self.post_event(self.get_event())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, "PAID")
+        self.assertIsNotNone(self.payment.payment_date)
+
+        # Repeated event doesn't change payment
+        payment_date = self.payment.payment_date
+        self.assertEqual(self.post_event(self.get_event()).status_code, status.HTTP_200_OK)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_date, payment_date)
+
+    def test_other_event(self) -> None:
+        response = self.post_event(self.get_event("checkout.session.expired"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, "CREATED")
+
+    def test_invalid_signature(self) -> None:
+        response = self.post_event(self.get_event(), secret="whsec_other")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, "CREATED")
+
+    @patch.object(StripeAPIService, "retrieve_session")
+    def test_retrieve_without_stripe(self, mock_retrieve_session: Mock) -> None:
+        request = self.factory.get(reverse("users:payment-detail", kwargs={"pk": self.payment.pk}))
+        force_authenticate(request, user=self.user)
+        response = PaymentRetrieveAPIView.as_view()(request, pk=self.payment.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["transfer"]["session_id"], "cs_test")
+        mock_retrieve_session.assert_not_called()
+
+
+class PaymentListTest(APITestCase):
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+        self.moderator = User.objects.create(email="moderator@test.com", is_active=True)
+        self.moderator.groups.add(Group.objects.get_or_create(name=MODERATORS_GROUP_NAME)[0])
+        course = Course.objects.create(name="test_course", preview="", video_url="", owner=self.moderator, price=100)
+
+        now = timezone.now()
+        dates = [now, now - timedelta(days=1), None, now, None, now - timedelta(microseconds=1)]
+        self.payments = []
+        for number, payment_date in enumerate(dates):
+            payment = Payment.objects.create(
+                owner=self.moderator,
+                paid_course=course,
+                amount=100,
+                payment_method="TRANSFER" if number % 2 else "CASH",
+                payment_date=payment_date,
+            )
+            Transfer.objects.create(payment=payment, session_id=f"cs_{number}", price_id="price", product_id="prod")
+            self.payments.append(payment)
+
+    def get_all_pages(self, params: dict) -> list[int]:
+        view = PaymentListAPIView.as_view()
+        request = self.factory.get(reverse("users:payment-list"), {**params, "page_size": 2})
+        ids = []
+        while request is not None:
+            force_authenticate(request, user=User.objects.get(pk=self.moderator.pk))
+            # Role of user, page of payments (two queries on page with end of payments with date)
+            # and prefetch of transfers
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request)
+            self.assertLessEqual(len(queries), 4)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [payment["id"] for payment in response.data["results"]]
+            request = self.factory.get(response.data["next"]) if response.data["next"] else None
+        return ids
+
+    def test_payment_list_pages(self) -> None:
+        # Payments without date are last in ascending order and first in descending order
+        expected = sorted(
+            self.payments, key=lambda payment: (payment.payment_date is None, payment.payment_date or 0, payment.pk)
+        )
+        self.assertEqual(self.get_all_pages({}), [payment.pk for payment in expected])
+        self.assertEqual(
+            self.get_all_pages({"ordering": "-payment_date"}), [payment.pk for payment in reversed(expected)]
+        )
+
+    def test_payment_list_invalid_cursor(self) -> None:
+        view = PaymentListAPIView.as_view()
+        paginator = PaymentListKeysetPaginator()
+        for position in (["date", 1], [None, "id"], [None, None]):
+            with self.subTest(position=position):
+                cursor = paginator.encode_cursor(position)
+                request = self.factory.get(reverse("users:payment-list"), {"cursor": cursor})
+                force_authenticate(request, user=self.moderator)
+
+                self.assertEqual(view(request).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_payment_list_filter(self) -> None:
+        ids = self.get_all_pages({"payment_method": "CASH", "ordering": "-payment_date"})
+
+        cash_payments = [payment for payment in self.payments if payment.payment_method == "CASH"]
+        self.assertCountEqual(ids, [payment.pk for payment in cash_payments])
@@ -0,0 +1,75 @@
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from users.models import OutboxEmail, User
+from users.tasks import send_outbox_emails
+from users.views import UserRegisterAPIView
+
+
+class RegistrationTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+
+    @patch.object(send_outbox_emails, "delay")
+    def test_registration_email(self, mock_delay: Mock) -> None:
+
+        request = self.factory.post(
+            reverse("users:register"),
+            data={
+                "email": "new_user@test.com",
+                "password1": "test_PASSWORD",
+                "password2": "test_PASSWORD",
+                "phone": None,
+                "country": None,
+                "avatar": None,
+            },
+            format="json",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = UserRegisterAPIView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email="new_user@test.com")
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password("test_PASSWORD"))
+
+        # Email is not sent in request, it is saved to outbox and task is started after commit
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get(to="new_user@test.com")
+        self.assertIn(f"/users/email_confirm/{user.token}/", email.body)
+        self.assertEqual(email.priority, OutboxEmail.PRIORITY_HIGH)
+        mock_delay.assert_called_once()
+
+    @patch.object(send_outbox_emails, "delay")
+    def test_benchmark_registration(self, mock_delay: Mock) -> None:
+
+        out = StringIO()
+        call_command("benchmark_registration", count=2, stdout=out)
+
+        self.assertIn("Registrations: 2", out.getvalue())
+        self.assertFalse(User.objects.filter(email__startswith="benchmark_user_").exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_benchmark_registration_outbox_locked(self) -> None:
+
+        # Worker sends emails of outbox, so emails of benchmark users could be sent
+        other_connection = connections.create_connection("default")
+        self.addCleanup(other_connection.close)
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", ["email_outbox"])
+
+        with self.assertRaises(CommandError):
+            call_command("benchmark_registration", count=2, stdout=StringIO())
+        self.assertFalse(User.objects.filter(email__startswith="benchmark_user_").exists())
+
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", ["email_outbox"])
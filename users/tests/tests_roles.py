@@ -0,0 +1,41 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from users.models import User
+from users.src.roles import MODERATORS_GROUP_NAME, is_moderator
+
+
+@override_settings(CACHE_ENABLED=True)
+class ModeratorRoleTest(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.group, _ = Group.objects.get_or_create(name=MODERATORS_GROUP_NAME)
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+
+    def test_role_cache(self) -> None:
+        self.assertFalse(is_moderator(User.objects.get(pk=self.user.pk)))
+
+        # Role is resolved once per user object and then got from cache
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(is_moderator(user))
+            self.assertFalse(is_moderator(user))
+
+    def test_role_invalidation(self) -> None:
+        self.assertFalse(is_moderator(User.objects.get(pk=self.user.pk)))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(is_moderator(User.objects.get(pk=self.user.pk)))
+
+        self.group.user_set.remove(self.user)
+        self.assertFalse(is_moderator(User.objects.get(pk=self.user.pk)))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(is_moderator(User.objects.get(pk=self.user.pk)))
+
+        self.group.name = "Другая группа"
+        self.group.save()
+        self.assertFalse(is_moderator(User.objects.get(pk=self.user.pk)))
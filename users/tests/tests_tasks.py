@@ -0,0 +1,94 @@
+from unittest.mock import Mock, patch
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from courses.models import Course
+from users.models import Payment, Transfer, User
+from users.src.transfer_api_service import StripeAPIService
+from users.tasks import ban_inactive_users, create_transfer, reconcile_payments
+
+
+class BanInactiveUsersTest(APITestCase):
+
+    def setUp(self) -> None:
+        now = timezone.now()
+        self.inactive_users = [
+            User.objects.create(
+                email=f"inactive_{i}@test.com", is_active=True, last_login=now - timezone.timedelta(days=40)
+            )
+            for i in range(5)
+        ]
+        self.active_user = User.objects.create(email="active@test.com", is_active=True, last_login=now)
+        self.new_user = User.objects.create(email="new@test.com", is_active=True, last_login=None)
+
+    @patch("users.tasks.BAN_CHUNK_SIZE", 2)
+    def test_ban_inactive_users(self) -> None:
+        with self.assertLogs("celery_tasks", level="INFO") as logs:
+            ban_inactive_users()
+
+        self.assertIn("5 users banned", logs.output[0])
+        inactive_pks = [user.pk for user in self.inactive_users]
+        self.assertFalse(User.objects.filter(pk__in=inactive_pks, is_active=True).exists())
+        self.assertFalse(User.objects.filter(pk__in=[self.active_user.pk, self.new_user.pk], is_active=False).exists())
+
+
+class ReconcilePaymentsTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+        self.course = Course.objects.create(name="Test Course", description="", preview="", owner=self.user, price=100)
+        self.payments = []
+        for i in range(5):
+            payment = Payment.objects.create(
+                owner=self.user, paid_course=self.course, amount=100, payment_method="TRANSFER"
+            )
+            Transfer.objects.create(payment=payment, session_id=f"cs_{i}", price_id="price", product_id="prod")
+            self.payments.append(payment)
+
+    @patch("users.tasks.PAYMENT_RECONCILE_BATCH_SIZE", 2)
+    @patch.object(StripeAPIService, "retrieve_session")
+    def test_reconcile_payments(self, mock_retrieve_session: Mock) -> None:
+        paid_sessions = {"cs_0", "cs_3"}
+
+        def retrieve_session(session_id: str) -> dict:
+            if session_id == "cs_4":
+                raise ConnectionError("Stripe is not available")
+            return {"id": session_id, "payment_status": "paid" if session_id in paid_sessions else "unpaid"}
+
+        mock_retrieve_session.side_effect = retrieve_session
+
+        # Payment without created transfer is not checked
+        Payment.objects.create(owner=self.user, paid_course=self.course, amount=100, payment_method="TRANSFER")
+
+        with self.assertLogs("celery_tasks", level="INFO") as logs:
+            reconcile_payments()
+
+        # Error of Stripe is counted separately from checked payments
+        self.assertIn("checked: 4, paid: 2, errors: 1", logs.output[0])
+        self.assertEqual(mock_retrieve_session.call_count, 5)
+        paid_ids = set(Payment.objects.filter(payment_status="PAID").values_list("id", flat=True))
+        self.assertEqual(paid_ids, {self.payments[0].pk, self.payments[3].pk})
+
+
+class CreateTransferTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+        self.course = Course.objects.create(name="Test Course", description="", preview="", owner=self.user, price=100)
+        self.payment = Payment.objects.create(
+            owner=self.user, paid_course=self.course, amount=100, payment_method="TRANSFER"
+        )
+
+    @patch.object(StripeAPIService, "create_transfer_and_return_data", side_effect=ConnectionError("Stripe error"))
+    def test_create_transfer_failed(self, mock_create_transfer: Mock) -> None:
+
+        # Retries are executed in test process without delay
+        with self.assertLogs("payment", level="ERROR") as logs:
+            result = create_transfer.apply(args=(self.payment.pk, "key"))
+
+        self.assertTrue(result.failed())
+        self.assertEqual(mock_create_transfer.call_count, create_transfer.max_retries + 1)
+        self.assertIn(f"Create transfer failed - Payment: {self.payment.pk}", logs.output[-1])
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, "FAILED")
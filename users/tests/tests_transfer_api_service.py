@@ -1,9 +1,18 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+import stripe
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
 from courses.models import Course
 from users.models import User
-from users.src.transfer_api_service import StripeAPIService
+from users.src import transfer_api_service
+from users.src.transfer_api_service import StripeAPIService, get_stripe_client
 
 
 class StripeAPIServiceTest(TestCase):
@@ -24,8 +33,8 @@ class StripeAPIServiceTest(TestCase):
             stripe_product_id=None,
         )
 
-    @patch("stripe.Price.create")
-    @patch("stripe.checkout.Session.create")
+    @patch.object(StripeAPIService, "create_price")
+    @patch.object(StripeAPIService, "create_session")
     @patch.object(StripeAPIService, "create_product")
     def test_stripe_api(self, mock_create_prod: Mock, mock_session_create: Mock, mock_price_create: Mock) -> None:
 
@@ -40,3 +49,163 @@ class StripeAPIServiceTest(TestCase):
         assert result["session_id"] == "sess_456"
         assert result["link"] == "https://stripe.com/new"
         assert self.course.stripe_product_id == "prod_new_456"
+
+
+class StripePriceRegistryTest(APITestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create(email="test_user@test.com", is_active=True)
+        self.course = Course.objects.create(
+            name="Test Course", description="", preview="", price=100.0, owner=self.user, stripe_product_id="prod_1"
+        )
+
+    @patch.object(StripeAPIService, "create_price")
+    @patch.object(StripeAPIService, "create_session")
+    def test_price_reuse(self, mock_session_create: Mock, mock_price_create: Mock) -> None:
+        mock_price_create.return_value = {"id": "price_1"}
+        mock_session_create.return_value = {"id": "sess_1", "url": "https://stripe.com/sess_1"}
+        service = StripeAPIService("sk_test")
+
+        self.assertEqual(service.create_transfer_and_return_data(self.course, 100.0)["price_id"], "price_1")
+        self.assertEqual(Course.objects.get(pk=self.course.pk).stripe_prices, {"rub:10000": "price_1"})
+
+        # Price from cache
+        with self.assertNumQueries(0):
+            self.assertEqual(service.create_transfer_and_return_data(self.course, 100.0)["price_id"], "price_1")
+
+        # Price from registry of product
+        cache.clear()
+        course = Course.objects.get(pk=self.course.pk)
+        self.assertEqual(service.create_transfer_and_return_data(course, 100.0)["price_id"], "price_1")
+        mock_price_create.assert_called_once_with("prod_1", 10000, idempotency_key=None)
+        self.assertEqual(mock_session_create.call_count, 3)
+
+        # New amount creates new price
+        mock_price_create.return_value = {"id": "price_2"}
+        self.assertEqual(service.create_transfer_and_return_data(course, 200.0)["price_id"], "price_2")
+        self.assertEqual(
+            Course.objects.get(pk=self.course.pk).stripe_prices, {"rub:10000": "price_1", "rub:20000": "price_2"}
+        )
+
+        # Price saved by concurrent task with other object of product is not overwritten
+        mock_price_create.return_value = {"id": "price_3"}
+        self.assertEqual(service.create_transfer_and_return_data(self.course, 300.0)["price_id"], "price_3")
+        self.assertEqual(
+            Course.objects.get(pk=self.course.pk).stripe_prices,
+            {"rub:10000": "price_1", "rub:20000": "price_2", "rub:30000": "price_3"},
+        )
+
+    @patch.object(StripeAPIService, "create_product", return_value={"id": "prod_2"})
+    @patch.object(StripeAPIService, "create_price", return_value={"id": "price_1"})
+    @patch.object(StripeAPIService, "create_session", return_value={"id": "sess_1", "url": "https://stripe.com/s"})
+    def test_product_saving(self, mock_session_create: Mock, mock_price_create: Mock, mock_create_prod: Mock) -> None:
+        course = Course.objects.create(name="New Course", description="", preview="", price=100.0, owner=self.user)
+        updated_at = course.updated_at
+
+        StripeAPIService("sk_test").create_transfer_and_return_data(course, 100.0)
+
+        # Product_id is saved without change of date of update of course
+        course.refresh_from_db()
+        self.assertEqual(course.stripe_product_id, "prod_2")
+        self.assertEqual(course.updated_at, updated_at)
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    """Handler of fake Stripe API. First "failures" requests get error 500, session "cs_slow" responds slowly"""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    requests = []
+    connections = set()
+
+    def do_GET(self) -> None:
+        self.handle_api_request()
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.handle_api_request()
+
+    def handle_api_request(self) -> None:
+        FakeStripeHandler.requests.append((self.command, self.path))
+        FakeStripeHandler.connections.add(self.client_address)
+        if FakeStripeHandler.failures > 0:
+            FakeStripeHandler.failures -= 1
+            return self.send_json(500, {"error": {"type": "api_error", "message": "Fake error"}})
+        if self.path == "/v1/products":
+            return self.send_json(200, {"id": "prod_fake", "object": "product"})
+        if self.path == "/v1/prices":
+            return self.send_json(200, {"id": "price_fake", "object": "price"})
+        if self.path == "/v1/checkout/sessions":
+            return self.send_json(
+                200, {"id": "cs_fake", "object": "checkout.session", "url": "https://checkout.test/cs_fake"}
+            )
+        if self.path == "/v1/checkout/sessions/cs_slow":
+            time.sleep(1)
+        return self.send_json(200, {"id": self.path.split("/")[-1], "object": "checkout.session"})
+
+    def send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: tuple) -> None:
+        pass
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address) -> None:
+        """Ignore errors of responses to closed connections after client timeout"""
+
+
+class StripeClientTest(TestCase):
+    """Tests of Stripe client against local fake HTTP server"""
+
+    def setUp(self) -> None:
+        FakeStripeHandler.failures = 0
+        FakeStripeHandler.requests = []
+        FakeStripeHandler.connections = set()
+        self.server = FakeStripeServer(("127.0.0.1", 0), FakeStripeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        api_base = f"http://127.0.0.1:{self.server.server_port}"
+        for name, value in (("STRIPE_API_BASE", api_base), ("STRIPE_READ_TIMEOUT", 0.3), ("STRIPE_MAX_RETRIES", 1)):
+            patcher = patch.object(transfer_api_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        get_stripe_client.cache_clear()
+        self.addCleanup(get_stripe_client.cache_clear)
+
+    def test_pooled_client(self) -> None:
+        self.assertIs(StripeAPIService("sk_test").client, StripeAPIService("sk_test").client)
+
+        service = StripeAPIService("sk_test")
+        with self.assertLogs("payment", level="INFO") as logs:
+            self.assertEqual(service.create_price("prod_fake", 10000)["id"], "price_fake")
+            session = service.create_session("price_fake")
+
+        self.assertEqual(session["url"], "https://checkout.test/cs_fake")
+        self.assertIn("Stripe call: create_price - ok", logs.output[0])
+        # Requests use one kept alive connection
+        self.assertEqual(len(FakeStripeHandler.connections), 1)
+
+    def test_retry(self) -> None:
+        FakeStripeHandler.failures = 1
+
+        session = StripeAPIService("sk_test").retrieve_session("cs_test")
+
+        self.assertEqual(session["id"], "cs_test")
+        self.assertEqual(len(FakeStripeHandler.requests), 2)
+
+    def test_timeout(self) -> None:
+        with self.assertLogs("payment", level="INFO") as logs, self.assertRaises(stripe.APIConnectionError):
+            StripeAPIService("sk_test").retrieve_session("cs_slow")
+
+        self.assertIn("Stripe call: retrieve_session - error", logs.output[0])
+        # Request and one retry
+        self.assertEqual(len(FakeStripeHandler.requests), 2)
@@ -0,0 +1,38 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from users.models import User
+from users.views import UserUpdateAPIView
+
+
+class UserUpdateTest(APITestCase):
+
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(email="test_user@test.com", password="test_PASSWORD", is_active=True)
+        self.other_user = User.objects.create(email="other_user@test.com", password="test_PASSWORD", is_active=True)
+        self.view = UserUpdateAPIView.as_view()
+
+    def update_user(self, user: User, pk: int, data: dict) -> Response:
+        request = self.factory.patch(reverse("users:user-update", kwargs={"pk": pk}), data=data, format="json")
+        force_authenticate(request, user=user)
+        return self.view(request, pk=pk)
+
+    def test_update_notification_mode(self) -> None:
+
+        response = self.update_user(self.user, self.user.pk, {"notification_mode": "DIGEST"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["notification_mode"], "DIGEST")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notification_mode, "DIGEST")
+
+    def test_update_other_user(self) -> None:
+
+        response = self.update_user(self.user, self.other_user.pk, {"notification_mode": "DIGEST"})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.other_user.refresh_from_db()
+        self.assertNotEqual(self.other_user.notification_mode, "DIGEST")
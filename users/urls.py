@@ -11,6 +11,7 @@ urlpatterns = [
     path("register/", views.UserRegisterAPIView.as_view(), name="register"),
     path("users/email_confirm/<str:token>/", views.UserEmailVerificationAPIView.as_view(), name="email-confirm"),
     path("users/<int:pk>/", views.UserRetrieveAPIView.as_view(), name="user-get"),
+    path("users/<int:pk>/payments/", views.UserPaymentListAPIView.as_view(), name="user-payments"),
     path("users/<int:pk>/update/", views.UserUpdateAPIView.as_view(), name="user-update"),
     path("users/<int:pk>/delete/", views.UserDestroyAPIView.as_view(), name="user-delete"),
     # token
@@ -20,6 +21,7 @@ urlpatterns = [
     path("payment/", views.PaymentListAPIView.as_view(), name="payment-list"),
     path("payment/create/", views.PaymentCreateAPIView.as_view(), name="payment-create"),
     path("payment/<int:pk>/", views.PaymentRetrieveAPIView.as_view(), name="payment-detail"),
+    path("payment/webhook/", views.StripeWebhookAPIView.as_view(), name="payment-webhook"),
     # subscribe
     path("subscribe/<int:pk>/", SubscribeAPIView.as_view(), name="subscribe"),
 ]
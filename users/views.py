@@ -1,41 +1,60 @@
 import logging
+from functools import partial
 
+import stripe
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from config.settings import STRIPE_API_KEY
+from config.settings import STRIPE_WEBHOOK_SECRET
 from courses.models import Course
 
 from .models import Payment, Subscription, Transfer, User
-from .permissions import IsModer, IsOwner
-from .serializers import PaymentSerializer, UserRegisterSerializer, UserRetrieveSerializer, UserSerializer
+from .paginators import PaymentKeysetPaginator, PaymentListKeysetPaginator
+from .permissions import IsModer, IsOwner, IsProfileOwner
+from .serializers import (PaymentSerializer, UserRegisterSerializer, UserRetrieveSerializer, UserSerializer,
+                          UserTokenObtainPairSerializer)
+from .src.idempotency import IDEMPOTENCY_HEADER, get_idempotency_key, get_idempotent_response
+from .src.last_login import record_last_login
 from .src.payment import PaymentServices
-from .src.transfer_api_service import StripeAPIService
+from .tasks import create_transfer
 
 logger = logging.getLogger("users")
 payment_logger = logging.getLogger("payment")
 
 
 class LoginView(TokenObtainPairView):
+    serializer_class = UserTokenObtainPairSerializer
     permission_classes = [AllowAny]
 
     def post(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        """
+        Get pair of tokens. Date of login is saved to write-behind buffer for authenticated user,
+        so user is not loaded and saved again
+        """
+
         logger.info(f"Method: {request.method} - url: {request.path} - User: {request.data['email']}")
-        user = User.objects.get(email=request.data["email"])
-        user.last_login = timezone.now()
-        user.save()
-        return super().post(request, args, kwargs)
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        record_last_login(serializer.user.pk, timezone.now())
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 class UserRegisterAPIView(generics.CreateAPIView):
@@ -55,22 +74,38 @@ class UserRegisterAPIView(generics.CreateAPIView):
 class UserRetrieveAPIView(generics.RetrieveAPIView):
     """
     Get user by id. With fields "email", "first_name", "phone", "country", "avatar" for any authenticated user
-    and extra "last_name", "payment_history" for owner user
+    and extra "last_name", "notification_mode", "payment_history" (url of payment history) for owner user
     """
 
     queryset = User.objects.all()
 
     def get_serializer_class(self):
-        if self.request.user == self.get_object():
+        """Serializer by "pk" from url, so user is not loaded twice"""
+
+        if str(self.request.user.pk) == str(self.kwargs.get("pk")):
             return UserRetrieveSerializer
         else:
             return UserSerializer
 
 
+class UserPaymentListAPIView(ListAPIView):
+    """
+    Get payment history of user, newest payments first, with keyset pagination by "cursor" query param.
+    For owner user and moderators
+    """
+
+    serializer_class = PaymentSerializer
+    pagination_class = PaymentKeysetPaginator
+    permission_classes = [IsAuthenticated, IsModer | IsProfileOwner]
+
+    def get_queryset(self):
+        return Payment.objects.filter(owner_id=self.kwargs["pk"]).prefetch_related("transfer_set")
+
+
 class UserUpdateAPIView(generics.UpdateAPIView):
     serializer_class = UserRetrieveSerializer
     queryset = User.objects.all()
-    permission_classes = [IsAuthenticated, IsOwner]
+    permission_classes = [IsAuthenticated, IsProfileOwner]
 
     def put(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
         logger.info(f"Method: {request.method} - url: {request.path} - User: {request.data['email']}")
@@ -124,12 +159,13 @@ class UserEmailVerificationAPIView(APIView):
 class PaymentListAPIView(ListAPIView):
     """
     Get payments list with filters fields "paid_course", "paid_lesson", "payment_method",
-    and ordering field "payment_date".
+    and ordering field "payment_date". Pages are selected by "cursor" query param with keyset pagination.
     For moderators users
     """
 
     serializer_class = PaymentSerializer
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.prefetch_related(Prefetch("transfer_set", queryset=Transfer.objects.order_by("id")))
+    pagination_class = PaymentListKeysetPaginator
     permission_classes = [IsAuthenticated, IsModer]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ("paid_course", "paid_lesson", "payment_method")
@@ -137,56 +173,89 @@ class PaymentListAPIView(ListAPIView):
 
 
 class PaymentRetrieveAPIView(generics.RetrieveAPIView):
+    """
+    Get payment by id. Status of payment is updated by Stripe webhook, so payment is only read from database.
+    For moderators and owner user
+    """
+
     serializer_class = PaymentSerializer
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.prefetch_related("transfer_set")
     permission_classes = [IsModer | IsOwner]
 
-    def get_object(self):
-        """
-        Call method update_status of payment model for object
-        """
 
-        obj = super().get_object()
-        obj.update_status()
-        return obj
+class StripeWebhookAPIView(APIView):
+    """
+    Webhook of Stripe events. Event is verified by signature from header "Stripe-Signature"
+    with secret STRIPE_WEBHOOK_SECRET, payment of completed checkout session is marked as paid
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(auto_schema=None)
+    def post(self, request: Request) -> Response:
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body, request.headers.get("Stripe-Signature"), STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.SignatureVerificationError) as e:
+            payment_logger.warning(f"Stripe webhook error: {e}")
+            return Response({"detail": "Неверная подпись события"}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = PaymentServices.update_status_by_event(event)
+        payment_logger.info(f"Stripe webhook - Event: {event['id']} {event['type']} - Paid payments: {updated}")
+        return Response({"status": "success"})
 
 
 class PaymentCreateAPIView(generics.CreateAPIView):
+    """
+    Create payment. Transfer of payment with method "TRANSFER" is created in Stripe by celery task,
+    so response with status 202 is returned at once and link of transfer appears in payment when it's ready.
+    Request with header "Idempotency-Key" repeated by user gets response of first request, key is passed to Stripe.
+    Request with used key and other data gets response with status 422
+    """
+
     serializer_class = PaymentSerializer
     queryset = Payment.objects.all()
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                IDEMPOTENCY_HEADER,
+                openapi.IN_HEADER,
+                description="Ключ идемпотентности, повторный запрос с ключом возвращает первый ответ",
+                type=openapi.TYPE_STRING,
+            )
+        ]
+    )
+    def post(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        return get_idempotent_response(request, partial(super().post, request, *args, **kwargs))
+
+    def create(self, request: Request, *args: tuple, **kwargs: dict) -> Response:
+        response = super().create(request, *args, **kwargs)
+        if response.data["payment_method"] == "TRANSFER":
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
     def perform_create(self, serializer: PaymentSerializer) -> None:
         """
         Method for creating a new payment
         Call method PaymentServices.save_payment_obj for creating a new payment
-        If payment method of payment "TRANSFER" create Transfer object
+        If payment method of payment "TRANSFER" start task for creating Transfer object after commit
         """
 
-        saved_payment_obj, product_obj = PaymentServices.save_payment_obj(serializer, owner=self.request.user)
+        with transaction.atomic():
+            saved_payment_obj, product_obj = PaymentServices.save_payment_obj(serializer, owner=self.request.user)
 
-        payment_logger.info(
-            f"Create payment - Product: {product_obj.pk} {product_obj.name} - {saved_payment_obj.payment_method}"
-        )
+            payment_logger.info(
+                f"Create payment - Product: {product_obj.pk} {product_obj.name} - {saved_payment_obj.payment_method}"
+            )
 
-        if saved_payment_obj.payment_method == "TRANSFER":
-            try:
-                transfer_service = StripeAPIService(api_key=STRIPE_API_KEY)
-                transfer_data = transfer_service.create_transfer_and_return_data(
-                    product=product_obj, amount=saved_payment_obj.amount
-                )
-                Transfer.objects.create(
-                    payment=Payment.objects.get(id=saved_payment_obj.id),
-                    link=transfer_data.get("link"),
-                    session_id=transfer_data.get("session_id"),
-                    price_id=transfer_data.get("price_id"),
-                    product_id=transfer_data.get("product_id"),
+            if saved_payment_obj.payment_method == "TRANSFER":
+                transaction.on_commit(
+                    partial(create_transfer.delay, saved_payment_obj.pk, get_idempotency_key(self.request))
                 )
 
-                payment_logger.info(f"Create transfer - Transfer: {product_obj.pk} {product_obj.name}")
-
-            except Exception as e:
-                payment_logger.error(f"Create transfer error: {e} - Transfer: {product_obj.pk} {product_obj.name}")
-
 
 @method_decorator(
     name="get",